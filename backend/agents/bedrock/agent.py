@@ -8,16 +8,24 @@ from utility import (
 )
 
 class BedrockInlineAgent:
-    def __init__(self):
-        self.tavily_search = TavilySearchResults()
-        self.wikipedia_query_runner = WikipediaQueryRun(
+    # Tool instances and action group schemas are shared by all agents; built once on first use
+    _tool_list = None
+    _action_groups = None
+
+    @classmethod
+    def _build_action_groups(cls):
+        if cls._action_groups is not None:
+            return cls._tool_list, cls._action_groups
+
+        tavily_search = TavilySearchResults()
+        wikipedia_query_runner = WikipediaQueryRun(
             api_wrapper=WikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=100)
         )
-        self.tool_list = {
-            self.tavily_search.get_name(): self.tavily_search,
-            self.wikipedia_query_runner.get_name(): self.wikipedia_query_runner,
+        cls._tool_list = {
+            tavily_search.get_name(): tavily_search,
+            wikipedia_query_runner.get_name(): wikipedia_query_runner,
         }
-        self.actionGroups = [
+        cls._action_groups = [
             {
                 "actionGroupExecutor": {
                     "customControl": "RETURN_CONTROL",  # configure roc
@@ -26,21 +34,25 @@ class BedrockInlineAgent:
                 "functionSchema": {
                     "functions": [
                         {
-                            "description": self.tavily_search.description,
-                            "name": self.tavily_search.get_name(),
-                            "parameters": create_parameters(self.tavily_search),
+                            "description": tavily_search.description,
+                            "name": tavily_search.get_name(),
+                            "parameters": create_parameters(tavily_search),
                             "requireConfirmation": "DISABLED",
                         },
                         {
-                            "description": self.wikipedia_query_runner.description,
-                            "name": self.wikipedia_query_runner.get_name(),
-                            "parameters": create_parameters(self.wikipedia_query_runner),
+                            "description": wikipedia_query_runner.description,
+                            "name": wikipedia_query_runner.get_name(),
+                            "parameters": create_parameters(wikipedia_query_runner),
                             "requireConfirmation": "DISABLED",
                         },
                     ]
                 },
             }
         ]
+        return cls._tool_list, cls._action_groups
+
+    def __init__(self):
+        self.tool_list, self.actionGroups = self._build_action_groups()
         self.model_id = "us.anthropic.claude-3-5-haiku-20241022-v1:0"
         self.agent_instruction = """You are a helpful AI assistant that provides users with latest updates in Generative Ai."""
 
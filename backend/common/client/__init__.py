@@ -1,4 +1,5 @@
 from .client import A2AClient
 from .card_resolver import A2ACardResolver
+from .pool import get_client, close_all
 
-__all__ = ["A2AClient", "A2ACardResolver"]
+__all__ = ["A2AClient", "A2ACardResolver", "get_client", "close_all"]
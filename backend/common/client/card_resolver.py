@@ -4,6 +4,7 @@ from common.types import (
     A2AClientJSONError,
 )
 import json
+import orjson
 
 
 class A2ACardResolver:
@@ -16,6 +17,6 @@ class A2ACardResolver:
             response = client.get(self.base_url + "/" + self.agent_card_path)
             response.raise_for_status()
             try:
-                return AgentCard(**response.json())
+                return AgentCard(**orjson.loads(response.content))
             except json.JSONDecodeError as e:
                 raise A2AClientJSONError(str(e)) from e
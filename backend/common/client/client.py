@@ -22,18 +22,18 @@ from common.types import (
 )
 import os
 import json
+import asyncio
+import orjson
 import logging
 # Configure logging
 LOGLEVEL = os.environ.get("LOGLEVEL", "INFO").upper()
 # logging.basicConfig(level=LOGLEVEL, format="%(asctime)s %(levelname)s: %(message)s")
-# Configure logging with a timestamp in the format
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 logger = logging.getLogger(__name__)
 
+# Parsed SSE events buffered between the network reader and the consumer
+SSE_QUEUE_SIZE = 64
+_STREAM_END = object()
+
 class A2AClient:
     def __init__(self, agent_card: AgentCard = None, url: str = None):
         if agent_card:
@@ -42,6 +42,24 @@ class A2AClient:
             self.url = url
         else:
             raise ValueError("Must provide either agent_card or url")
+        # One pooled client per A2AClient so JSON-RPC calls and SSE streams reuse
+        # keep-alive connections instead of reconnecting on every request.
+        # http2=True lets concurrent SSE subscriptions multiplex over one TLS connection;
+        # plain http:// agents keep using HTTP/1.1.
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, read=None),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            http2=True,
+        )
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
 
     async def send_task(self, payload: dict[str, Any]) -> SendTaskResponse:
         request = SendTaskRequest(params=payload)
@@ -52,65 +70,89 @@ class A2AClient:
     ) -> AsyncIterable[SendTaskStreamingResponse]:
         request = SendTaskStreamingRequest(params=payload)
         
-        # Use httpx.AsyncClient for true asynchronous operations
-        async with httpx.AsyncClient(timeout=None) as client: # This is correct
-            try:
-                # MODIFIED: Use aconnect_sse for asynchronous context management
-                async with aconnect_sse(
-                    client, 
-                    "POST", 
-                    self.url, 
-                    json=request.model_dump(by_alias=True) # Assuming by_alias is needed
-                ) as event_source:
-                    # Iterate asynchronously
-                    async for sse in event_source.aiter_sse():
-                        try:
-                            # logger.debug(f"A2AClient SSE Raw Data: {sse.data}") # Optional: for debugging raw SSE
-                            yield SendTaskStreamingResponse(**json.loads(sse.data))
-                        except json.JSONDecodeError as e_json:
-                            logger.error(f"A2AClient: JSONDecodeError for SSE data: {sse.data}, error: {e_json}")
-                            # Optionally yield an error object or skip
-                            continue 
-            except httpx.HTTPStatusError as e_status: # Catch HTTP status errors specifically if httpx_sse raises them this way
-                logger.error(f"A2AClient: HTTPStatusError during SSE streaming: {e_status.response.status_code}, response: {e_status.response.text[:200]}")
-                raise A2AClientHTTPError(e_status.response.status_code, f"HTTP error during streaming: {e_status.response.status_code}") from e_status
-            except httpx.RequestError as e_req: # Catch other httpx request errors (network, timeout, etc.)
-                logger.error(f"A2AClient: httpx.RequestError during SSE streaming: {e_req}")
-                raise A2AClientHTTPError(500, f"Request error during streaming: {str(e_req)}") from e_req
-            except json.JSONDecodeError as e_json_overall: # If connect_sse or initial response is bad JSON
-                logger.error(f"A2AClient: JSONDecodeError in SSE stream setup or non-event data: {e_json_overall}")
-                raise A2AClientJSONError(str(e_json_overall)) from e_json_overall
-            except Exception as e_general: # Catch any other unexpected errors
-                logger.error(f"A2AClient: Unexpected error during SSE streaming: {e_general}", exc_info=True)
-                # Re-raising with your custom error type if appropriate, or a generic one
-                raise A2AClientHTTPError(500, f"Unexpected streaming error: {str(e_general)}") from e_general
+        client = self._client
+        try:
+            # MODIFIED: Use aconnect_sse for asynchronous context management
+            async with aconnect_sse(
+                client, 
+                "POST", 
+                self.url, 
+                content=request.model_dump_json(by_alias=True).encode(), # Serialized by pydantic-core, no intermediate dict
+                headers={"content-type": "application/json"},
+            ) as event_source:
+                # A reader task parses events into a bounded queue, so socket reads are not
+                # paced by the consumer's per-event work; a full queue applies backpressure.
+                queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+                pump_task = asyncio.create_task(self._pump_sse(event_source, queue))
+                try:
+                    while True:
+                        item = await queue.get()
+                        if item is _STREAM_END:
+                            break
+                        if isinstance(item, Exception):
+                            raise item
+                        yield item
+                finally:
+                    pump_task.cancel()
+        except httpx.HTTPStatusError as e_status: # Catch HTTP status errors specifically if httpx_sse raises them this way
+            logger.error("A2AClient: HTTPStatusError during SSE streaming: %s, response: %s", e_status.response.status_code, e_status.response.text[:200])
+            raise A2AClientHTTPError(e_status.response.status_code, f"HTTP error during streaming: {e_status.response.status_code}") from e_status
+        except httpx.RequestError as e_req: # Catch other httpx request errors (network, timeout, etc.)
+            logger.error("A2AClient: httpx.RequestError during SSE streaming: %s", e_req)
+            raise A2AClientHTTPError(500, f"Request error during streaming: {str(e_req)}") from e_req
+        except json.JSONDecodeError as e_json_overall: # If connect_sse or initial response is bad JSON
+            logger.error("A2AClient: JSONDecodeError in SSE stream setup or non-event data: %s", e_json_overall)
+            raise A2AClientJSONError(str(e_json_overall)) from e_json_overall
+        except Exception as e_general: # Catch any other unexpected errors
+            logger.error("A2AClient: Unexpected error during SSE streaming: %s", e_general, exc_info=True)
+            # Re-raising with your custom error type if appropriate, or a generic one
+            raise A2AClientHTTPError(500, f"Unexpected streaming error: {str(e_general)}") from e_general
+
 
 
 
+    async def _pump_sse(self, event_source, queue: asyncio.Queue):
+        """Read SSE events into `queue`, ending with _STREAM_END or the exception that stopped the stream."""
+        try:
+            async for sse in event_source.aiter_sse():
+                try:
+                    # logger.debug(f"A2AClient SSE Raw Data: {sse.data}") # Optional: for debugging raw SSE
+                    await queue.put(SendTaskStreamingResponse(**orjson.loads(sse.data)))
+                except json.JSONDecodeError as e_json:
+                    logger.error("A2AClient: JSONDecodeError for SSE data: %s, error: %s", sse.data, e_json)
+                    # Optionally yield an error object or skip
+                    continue
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(_STREAM_END)
 
     async def _send_request(self, request: JSONRPCRequest) -> dict[str, Any]:
-        async with httpx.AsyncClient() as client: # This is already correct
-            try:
-                response = await client.post(
-                    self.url, json=request.model_dump(by_alias=True), timeout=30 # Use by_alias for Pydantic models
-                )
-                response.raise_for_status()
-                # It's good practice to check content-type before .json()
-                content_type = response.headers.get("content-type", "")
-                if "application/json" in content_type:
-                    return response.json()
-                else:
-                    logger.error(f"A2AClient _send_request: Unexpected content-type: {content_type}. Response text: {response.text[:500]}")
-                    raise A2AClientJSONError(f"Unexpected content-type: {content_type}. Expected application/json.")
-            except httpx.HTTPStatusError as e:
-                logger.error(f"A2AClient _send_request: HTTPStatusError status_code={e.response.status_code}, response_text={e.response.text[:500]}")
-                raise A2AClientHTTPError(e.response.status_code, str(e)+ f" Response: {e.response.text[:200]}") from e
-            except json.JSONDecodeError as e:
-                logger.error(f"A2AClient _send_request: JSONDecodeError for response: {response.text[:500]}")
-                raise A2AClientJSONError(str(e)) from e
-            except httpx.RequestError as e: # Network errors etc.
-                logger.error(f"A2AClient _send_request: httpx.RequestError: {e}")
-                raise A2AClientHTTPError(500, f"Network request error: {str(e)}") from e
+        client = self._client
+        try:
+            response = await client.post(
+                self.url,
+                content=request.model_dump_json(by_alias=True).encode(), # Use by_alias for Pydantic models
+                headers={"content-type": "application/json"},
+                timeout=30,
+            )
+            response.raise_for_status()
+            # It's good practice to check content-type before parsing the body
+            content_type = response.headers.get("content-type", "")
+            if "application/json" in content_type:
+                return orjson.loads(response.content)
+            else:
+                logger.error("A2AClient _send_request: Unexpected content-type: %s. Response text: %s", content_type, response.text[:500])
+                raise A2AClientJSONError(f"Unexpected content-type: {content_type}. Expected application/json.")
+        except httpx.HTTPStatusError as e:
+            logger.error("A2AClient _send_request: HTTPStatusError status_code=%s, response_text=%s", e.response.status_code, e.response.text[:500])
+            raise A2AClientHTTPError(e.response.status_code, str(e)+ f" Response: {e.response.text[:200]}") from e
+        except json.JSONDecodeError as e:
+            logger.error("A2AClient _send_request: JSONDecodeError for response: %s", response.text[:500])
+            raise A2AClientJSONError(str(e)) from e
+        except httpx.RequestError as e: # Network errors etc.
+            logger.error("A2AClient _send_request: httpx.RequestError: %s", e)
+            raise A2AClientHTTPError(500, f"Network request error: {str(e)}") from e
 
     async def get_task(self, payload: dict[str, Any]) -> GetTaskResponse:
         request = GetTaskRequest(params=payload)
@@ -0,0 +1,20 @@
+from common.client.client import A2AClient
+
+# Process-wide A2AClient instances keyed by agent URL so every caller talking to
+# the same agent shares one connection pool.
+_clients: dict[str, A2AClient] = {}
+
+
+def get_client(url: str) -> A2AClient:
+    client = _clients.get(url)
+    if client is None:
+        client = _clients[url] = A2AClient(url=url)
+    return client
+
+
+async def close_all():
+    """Close every pooled A2AClient. Call once from the application shutdown path."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
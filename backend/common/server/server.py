@@ -112,7 +112,10 @@ class A2AServer:
                 async for item in result:
                     yield {"data": item.model_dump_json(exclude_none=True)}
 
-            return EventSourceResponse(event_generator(result))
+            # Ask proxies not to buffer the stream so events reach the client as they are produced
+            return EventSourceResponse(
+                event_generator(result), headers={"X-Accel-Buffering": "no"}
+            )
         elif isinstance(result, JSONRPCResponse):
             return JSONResponse(result.model_dump(exclude_none=True))
         else:
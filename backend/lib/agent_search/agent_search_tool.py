@@ -5,17 +5,13 @@ import asyncio # For the lock
 
 # Import AgentClient from its sibling file agentclient.py
 from .agentclient import AgentClient 
-# Configure logging with a timestamp in the format
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+from lib.tool_input import parse_tool_input
 logger = logging.getLogger(__name__)
 
 # Module-level (or class-level) variable to hold the initialized A2A client instance
 # This ensures AgentClient is initialized and discover() is called only once per server process.
-_shared_a2a_client_instance: AgentClient | None | str = None # Can be Client, None, or "ERROR_DURING_INIT"
+_INIT_ERROR = object() # Sentinel stored when initialization/discovery failed; retried on next call
+_shared_a2a_client_instance: AgentClient | None | object = None # Can be Client, None, or _INIT_ERROR
 _a2a_client_init_lock = asyncio.Lock() # Lock to prevent multiple initializations/discoveries concurrently
 
 async def get_initialized_a2a_client() -> AgentClient:
@@ -24,32 +20,37 @@ async def get_initialized_a2a_client() -> AgentClient:
     Handles one-time initialization and discovery.
     """
     global _shared_a2a_client_instance
-    if _shared_a2a_client_instance is None or _shared_a2a_client_instance == "ERROR_DURING_INIT":
-        async with _a2a_client_init_lock:
-            # Double check after acquiring lock
-            if _shared_a2a_client_instance is None or _shared_a2a_client_instance == "ERROR_DURING_INIT":
-                logger.info("[AgentSearchTool] Initializing AgentClient for the first time and discovering agent...")
-                try:
-                    # Configuration for agent_url could come from environment variables or a config file
-                    client = AgentClient(agent_url="http://localhost:10000") # Or your configurable URL
-                    await client.discover() # Perform the async discovery
-                    
-                    if not client.client: # Check if A2AClient's internal client got set by discover()
-                        logger.error("[AgentSearchTool] AgentClient internal client (A2AClient) was not initialized after discover call.")
-                        _shared_a2a_client_instance = "ERROR_DURING_INIT"
-                    else:
-                        _shared_a2a_client_instance = client
-                        logger.info("[AgentSearchTool] AgentClient initialized and agent discovered successfully.")
-                except Exception as e:
-                    logger.error(f"[AgentSearchTool] CRITICAL: Failed to initialize or discover AgentClient: {e}", exc_info=True)
-                    _shared_a2a_client_instance = "ERROR_DURING_INIT"
+    # Fast path: once initialized, no lock is taken
+    instance = _shared_a2a_client_instance
+    if isinstance(instance, AgentClient):
+        return instance
+
+    async with _a2a_client_init_lock:
+        # Double check after acquiring lock
+        if not isinstance(_shared_a2a_client_instance, AgentClient):
+            logger.info("[AgentSearchTool] Initializing AgentClient for the first time and discovering agent...")
+            try:
+                # Configuration for agent_url could come from environment variables or a config file
+                client = AgentClient(agent_url="http://localhost:10000") # Or your configurable URL
+                await client.discover() # Perform the async discovery
+                
+                if not client.client: # Check if A2AClient's internal client got set by discover()
+                    logger.error("[AgentSearchTool] AgentClient internal client (A2AClient) was not initialized after discover call.")
+                    _shared_a2a_client_instance = _INIT_ERROR
+                else:
+                    _shared_a2a_client_instance = client
+                    logger.info("[AgentSearchTool] AgentClient initialized and agent discovered successfully.")
+            except Exception as e:
+                logger.error(f"[AgentSearchTool] CRITICAL: Failed to initialize or discover AgentClient: {e}", exc_info=True)
+                _shared_a2a_client_instance = _INIT_ERROR
+        instance = _shared_a2a_client_instance
     
-    if isinstance(_shared_a2a_client_instance, str) and _shared_a2a_client_instance == "ERROR_DURING_INIT":
+    if instance is _INIT_ERROR:
         raise ConnectionError("AgentClient could not be initialized/discovered. Check A2A server and configurations.")
-    if not isinstance(_shared_a2a_client_instance, AgentClient): # Should not happen if lock works
+    if not isinstance(instance, AgentClient): # Should not happen if lock works
         raise ConnectionError("AgentClient not available or initialization failed unexpectedly.")
         
-    return _shared_a2a_client_instance
+    return instance
 
 async def _execute_agent_search_remotely(query: str, tool_use_id: str) -> dict:
     """
@@ -116,7 +117,7 @@ async def handle_agent_search(manager_instance, tool_use_content: dict) -> dict:
 
     try:
         tool_input_str = tool_use_content.get("content", "{}")
-        parsed_tool_input = json.loads(tool_input_str)
+        parsed_tool_input = parse_tool_input(tool_input_str)
         query = parsed_tool_input.get("query", "")
 
         if not query:
@@ -144,12 +145,15 @@ async def handle_agent_search(manager_instance, tool_use_content: dict) -> dict:
         actual_search_coro_factory = lambda: _execute_agent_search_remotely(query, tool_use_id)
 
         logger.info(f"Launching Background Tool Task")            
-        await manager_instance.launch_background_tool_task(
+        launched = await manager_instance.launch_background_tool_task(
             tool_use_id,
             raw_tool_name_from_event, 
             actual_search_coro_factory
         )
         logger.info(f"Returned from launching Background Tool Task")            
+        if not launched:
+            logger.warning(f"[Tool:{raw_tool_name_from_event}] (ID: {tool_use_id}) System busy, background search not started.")
+            return {"result": f"The system is busy with other requests. Please try the {raw_tool_name_from_event} again in a moment.", "status": "error"}
         
         placeholder_message = f"Okay, I'm starting the {raw_tool_name_from_event} for '{query}'. This may take a moment. I'll notify you in the chat when it's complete."
         logger.info(f"[Tool:{raw_tool_name_from_event}] (ID: {tool_use_id}) Returning placeholder to Nova Sonic: '{placeholder_message}'")
@@ -165,25 +169,26 @@ async def handle_agent_search(manager_instance, tool_use_content: dict) -> dict:
         logger.error(f"[Tool:{raw_tool_name_from_event}] (ID: {tool_use_id}) Error in handler: {e}", exc_info=True)
         return {"result": f"An unexpected error occurred while initiating {raw_tool_name_from_event}.", "status": "error"}
 
-# get_agent_search_tool_spec() function remains the same as before.
-# Ensure it's correctly defined in this file.
-def get_agent_search_tool_spec() -> dict:
-    """Returns the tool specification for the agentSearch tool."""
-    return {
-        "toolSpec": {
-            "name": "agentSearch",
-            "description": "Performs a search using an intelligent agent for a given query. This process typically takes time. Tool will start the search, and return with wait for result message. User will ask to check on the results of the agent search after they have been informed by an out of band notifcation.",
-            "inputSchema": {
-                "json": json.dumps({
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "The search query, topic, or question for the agent."
-                        }
-                    },
-                    "required": ["query"]
-                })
-            }
+# The tool spec is constant, so its inputSchema JSON string is serialized once at import.
+_TOOL_SPEC = {
+    "toolSpec": {
+        "name": "agentSearch",
+        "description": "Performs a search using an intelligent agent for a given query. This process typically takes time. Tool will start the search, and return with wait for result message. User will ask to check on the results of the agent search after they have been informed by an out of band notifcation.",
+        "inputSchema": {
+            "json": json.dumps({
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The search query, topic, or question for the agent."
+                    }
+                },
+                "required": ["query"]
+            })
         }
-    }
\ No newline at end of file
+    }
+}
+
+def get_agent_search_tool_spec() -> dict:
+    """Returns the tool specification for the agentSearch tool. Callers must not mutate it."""
+    return _TOOL_SPEC
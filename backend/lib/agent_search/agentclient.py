@@ -1,19 +1,59 @@
 import asyncio
-import uuid
+import hashlib
+import os
+import pathlib
+import stat
+import time
 import logging
+from urllib.parse import urlsplit
 from common.client.card_resolver import A2ACardResolver
-from common.client.client import A2AClient
-from common.types import TaskState
+from common.client.pool import get_client
+from common.types import AgentCard, TaskState
 
 # Configure logging
-# Configure logging with a timestamp in the format
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 logger = logging.getLogger(__name__)
 
+# Agent cards cached on disk are reused for this many seconds, then refetched
+CARD_CACHE_TTL = 300
+# Per-user cache directory (0700); a card decides where agent queries go, so it must not be in a shared location
+CARD_CACHE_DIR = pathlib.Path(os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache") / "nova-sonic-demo"
+
+# Stream events arriving within STREAM_BATCH_WINDOW seconds of each other are handled together
+STREAM_BATCH_MAX = 32
+STREAM_BATCH_WINDOW = 0.05
+
+async def _iter_batches(events, max_batch=STREAM_BATCH_MAX, window=STREAM_BATCH_WINDOW):
+    """
+    Regroup an async iterator into lists of items that arrive close together.
+    A batch is emitted when it reaches max_batch items or when no new item
+    arrives within `window` seconds. The pending read is never cancelled on
+    timeout, so the underlying stream is not interrupted.
+    """
+    it = aiter(events)
+    pending = None
+    batch = []
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(it))
+            done, _ = await asyncio.wait({pending}, timeout=window if batch else None)
+            if pending in done:
+                try:
+                    batch.append(pending.result())
+                except StopAsyncIteration:
+                    if batch:
+                        yield batch
+                    return
+                finally:
+                    pending = None
+                if len(batch) < max_batch:
+                    continue
+            yield batch
+            batch = []
+    finally:
+        if pending is not None:
+            pending.cancel()
+
 class AgentClient:
     def __init__(self,
                  agent_url: str = "http://localhost:10000",
@@ -27,13 +67,71 @@ class AgentClient:
         self.card_resolver = A2ACardResolver(self.agent_url)
         self.agent_card = None
         self.client = None
+        self._card_cache_path = CARD_CACHE_DIR / (
+            "a2a_card_" + hashlib.md5(self.agent_url.encode(), usedforsecurity=False).hexdigest() + ".json"
+        )
+        self._revalidate_task = None
+
+    def _load_cached_card(self) -> AgentCard | None:
+        """
+        Return the on-disk agent card if it is younger than CARD_CACHE_TTL, else None.
+        The file must be owned by this user and private to it (no group/other access), and the
+        card must point at the same host as agent_url; anything else is ignored.
+        """
+        try:
+            st = self._card_cache_path.stat()
+            if hasattr(os, "getuid") and (st.st_uid != os.getuid() or stat.S_IMODE(st.st_mode) & 0o077):
+                logger.warning("Ignoring agent card cache %s: not private to this user", self._card_cache_path)
+                return None
+            if time.time() - st.st_mtime >= CARD_CACHE_TTL:
+                return None
+            card = AgentCard.model_validate_json(self._card_cache_path.read_bytes())
+        except (OSError, ValueError) as e: # Missing file or stale/corrupt contents
+            logger.debug("Agent card cache unusable (%s): %s", self._card_cache_path, e)
+            return None
+        if urlsplit(card.url).hostname != urlsplit(self.agent_url).hostname:
+            logger.warning("Ignoring cached agent card for %s: it points at %s", self.agent_url, card.url)
+            return None
+        return card
+
+    def _write_cached_card(self, card: AgentCard) -> None:
+        """Write the card with 0600 permissions, via a temp file so readers never see a partial card."""
+        CARD_CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp_path = self._card_cache_path.with_name(f"{self._card_cache_path.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(card.model_dump_json().encode())
+        os.replace(tmp_path, self._card_cache_path)
+
+    async def _fetch_card(self) -> AgentCard:
+        """Fetch the agent card over HTTP (off the event loop) and refresh the disk cache."""
+        card = await asyncio.to_thread(self.card_resolver.get_agent_card)
+        try:
+            await asyncio.to_thread(self._write_cached_card, card)
+        except OSError as e:
+            logger.warning("Could not write agent card cache %s: %s", self._card_cache_path, e)
+        return card
+
+    async def _revalidate_card(self):
+        try:
+            self.agent_card = await self._fetch_card()
+            self.client = get_client(self.agent_card.url)
+        except Exception as e:
+            logger.warning("Background agent card revalidation failed: %s", e)
 
     async def discover(self):
         """
-        Synchronously fetch the agent card and initialize the A2AClient.
+        Resolve the agent card and attach the shared A2AClient for its URL.
+        A fresh on-disk copy is used when available and revalidated in the background;
+        otherwise the card is fetched from the agent.
         """
-        self.agent_card = self.card_resolver.get_agent_card()
-        self.client = A2AClient(agent_card=self.agent_card)
+        cached_card = await asyncio.to_thread(self._load_cached_card)
+        if cached_card is not None:
+            self.agent_card = cached_card
+            self._revalidate_task = asyncio.create_task(self._revalidate_card())
+        else:
+            self.agent_card = await self._fetch_card()
+        self.client = get_client(self.agent_card.url)
         # Log discovery details
         logger.info(f"Discovered agent: {self.agent_card.name}")
         logger.info(f"Agent URL: {self.agent_url}")
@@ -53,13 +151,12 @@ class AgentClient:
         stream: Whether to use streaming if supported by the agent.
         Returns the assembled text on completion.
         """
-        # Ensure the client is initialized
-        if not self.client:
-            self.discover()
+        # discover() must have been awaited first (get_initialized_a2a_client guarantees it)
+        assert self.client is not None, "call discover() first"
 
         # Create unique identifiers for this task/session
-        task_id = uuid.uuid4().hex
-        session_id = uuid.uuid4().hex
+        task_id = os.urandom(16).hex()
+        session_id = os.urandom(16).hex()
 
         # Build the params payload including the required 'id'
         payload = {
@@ -72,17 +169,27 @@ class AgentClient:
                 ]
             }
         }
-        logger.info(f"Sending task id={task_id} session={session_id}")
+        logger.info("Sending task id=%s session=%s", task_id, session_id)
 
-        # Collect parts for the final assembly
-        parts = []
+        # Streamed artifact text by artifact index; append=True extends an artifact, anything else replaces it
+        streamed_artifacts: dict[int, list[str]] = {}
 
         # Streaming path
         if stream and getattr(self.agent_card.capabilities, 'streaming', False):
             logger.info("Using streaming API...")
             # Stream incremental events
-            async for event in self.client.send_task_streaming(payload):
-                logger.info(f"stream event => {event.model_dump_json()}")
+            async for batch in _iter_batches(self.client.send_task_streaming(payload)):
+                # Serializing every event is costly on token streams; only do it when DEBUG is on
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("stream events (%d) => %s", len(batch), [event.model_dump_json() for event in batch])
+                for event in batch:
+                    artifact = getattr(event.result, 'artifact', None)
+                    if artifact is not None:
+                        chunks = [getattr(part, 'text', None) or "" for part in artifact.parts]
+                        if artifact.append:
+                            streamed_artifacts.setdefault(artifact.index, []).extend(chunks)
+                        else:
+                            streamed_artifacts[artifact.index] = chunks
             # Retrieve final task status when streaming completes
             response = await self.client.get_task({"id": task_id})
         else:
@@ -96,32 +203,33 @@ class AgentClient:
         # Validate completion state
         state = result.status.state
         if state != TaskState.COMPLETED:
-            logger.warning(f"Task {task_id} completed with state={state}")
+            logger.warning("Task %s completed with state=%s", task_id, state)
         else:
-            logger.info(f"Task {task_id} completed successfully.")
+            logger.info("Task %s completed successfully.", task_id)
 
         # Validate matching sessionId
         if getattr(result, 'sessionId', None) != session_id:
-            logger.warning(f"Mismatched sessionId: sent={session_id}, received={getattr(result, 'sessionId', None)}")
+            logger.warning("Mismatched sessionId: sent=%s, received=%s", session_id, getattr(result, 'sessionId', None))
         else:
-            logger.info(f"SessionId verified: {session_id}")
+            logger.info("SessionId verified: %s", session_id)
 
-        # Assemble all text parts from artifacts
-        try:
-            for artifact in result.artifacts:
-                for part in artifact.parts:
-                    parts.append(part.text)
-        except Exception as e:
-            logger.error(f"Error assembling parts: {e}")
+        # Assemble all text parts from artifacts, unless they already arrived on the stream
+        final_text = "".join(
+            "".join(streamed_artifacts[index]) for index in sorted(streamed_artifacts)
+        )
+        if not final_text:
+            try:
+                final_text = "".join(part.text for artifact in result.artifacts for part in artifact.parts)
+            except Exception as e:
+                logger.error("Error assembling parts: %s", e)
 
-        final_text = "".join(parts)
-        logger.info(f"Final assembled text:\n{final_text}")
+        logger.info("Final assembled text:\n%s", final_text)
         return final_text
 
     async def close(self):
         """
-        Placeholder for cleanup actions if needed.
+        Detach from the shared A2AClient. Pooled connections are closed by
+        common.client.pool.close_all() at application shutdown.
         """
         logger.info("Closing AgentClient")
-        # No explicit connections to close in current implementation
-        pass
+        self.client = None
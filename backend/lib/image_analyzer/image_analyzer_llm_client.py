@@ -1,59 +1,78 @@
 # backend/lib/image_analyzer/image_analyzer.py
 import boto3
+import json
 import logging
-import base64
+import pybase64
 import asyncio
+import concurrent.futures
+from typing import Any
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 logger = logging.getLogger(__name__)
 
+# Dedicated pool for blocking Bedrock converse calls so they don't queue behind
+# other users of the loop's default executor.
+_BEDROCK_EXEC = concurrent.futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix="bedrock")
+
+# bedrock-runtime clients keyed by region. Creating a boto3 client loads service
+# models and is expensive; clients are thread-safe, so instances share them.
+_CLIENTS: dict[str, Any] = {}
+
+def _get_bedrock(region: str):
+    client = _CLIENTS.get(region)
+    if client is None:
+        client = _CLIENTS[region] = boto3.client('bedrock-runtime', region_name=region)
+    return client
+
 class ImageAnalyzerLLMClient: # Renamed for clarity, this is the LLM interaction part
     def __init__(self, region="us-east-1"):
         self.region = region
-        self.bedrock_runtime = boto3.client('bedrock-runtime', region_name=region)
+        self.bedrock_runtime = _get_bedrock(region)
+
+    def _converse_sync(self, model_id: str, image_bytes: bytes) -> dict:
+        """Blocking Bedrock converse call; runs on _BEDROCK_EXEC."""
+        return self.bedrock_runtime.converse(
+            modelId=model_id,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "text": "Describe what you see in this image in two sentences, phrased as 'I see...'."
+                        },
+                        {
+                            "image": {
+                                "format": "jpeg",
+                                "source": {
+                                    "bytes": image_bytes
+                                }
+                            }
+                        }
+                    ]
+                }
+            ],
+        )
 
-    async def describe_image_with_llm(self, base64_image_data: str, prompt_text: str) -> str:
+    async def describe_image_with_llm(self, image: bytes | str, prompt_text: str) -> str:
         """
-        Sends base64 image data and a prompt to a Bedrock multimodal model (e.g., Claude 3 Sonnet/Haiku, Titan)
+        Sends an image and a prompt to a Bedrock multimodal model (e.g., Claude 3 Sonnet/Haiku, Titan)
         and returns the textual description.
+        image: raw image bytes, or a base64-encoded string which is decoded here.
         """
-        logger.info(f"Sending image to LLM for description. Prompt: '{prompt_text}', Image (first 60 chars): {base64_image_data[:60]}...")
-        image_bytes = base64.b64decode(base64_image_data)
+        if isinstance(image, str):
+            logger.info(f"Sending image to LLM for description. Prompt: '{prompt_text}', Image (first 60 chars): {image[:60]}...")
+            # Decode off the event loop; multi-MB screenshots would otherwise stall it
+            image_bytes = await asyncio.to_thread(pybase64.b64decode, image, validate=False)
+        else:
+            logger.info(f"Sending image to LLM for description. Prompt: '{prompt_text}', Image: {len(image)} bytes")
+            image_bytes = image
 
         # model_id = "anthropic.claude-3-sonnet-20240229-v1:0" 
         model_id = "amazon.nova-lite-v1:0"
         
         # Use a thread pool to avoid blocking the event loop
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         try:
-            response = await loop.run_in_executor(
-                None,  # Uses default ThreadPoolExecutor
-                lambda: self.bedrock_runtime.converse(
-                    modelId=model_id,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "text": "Describe what you see in this image in two sentences, phrased as 'I see...'."
-                                },
-                                {
-                                    "image": {
-                                        "format": "jpeg",
-                                        "source": {
-                                            "bytes": image_bytes
-                                        }
-                                    }
-                                }
-                            ]
-                        }
-                    ],
-                )
-            )
+            response = await loop.run_in_executor(_BEDROCK_EXEC, self._converse_sync, model_id, image_bytes)
             # Extract the text response
             description = None
             for content in response['output']['message']['content']:
@@ -71,4 +90,50 @@ class ImageAnalyzerLLMClient: # Renamed for clarity, this is the LLM interaction
 
         except Exception as e:
             logger.error(f"Error during Bedrock converse call for image description: {e}", exc_info=True)
-            return f"Error analyzing image with LLM: {str(e)}"
\ No newline at end of file
+            return f"Error analyzing image with LLM: {str(e)}"
+
+    def _converse_batch_sync(self, model_id: str, images: list[bytes]) -> dict:
+        """Blocking Bedrock converse call with several images in one message; runs on _BEDROCK_EXEC."""
+        content = []
+        for i, image_bytes in enumerate(images, start=1):
+            content.append({"text": f"Image {i}:"})
+            content.append({"image": {"format": "jpeg", "source": {"bytes": image_bytes}}})
+        content.append({
+            "text": f"Describe what you see in each of the {len(images)} images above in two sentences, phrased as 'I see...'. "
+                    f"Respond only with a JSON array of {len(images)} strings, one per image, in order."
+        })
+        return self.bedrock_runtime.converse(
+            modelId=model_id,
+            messages=[{"role": "user", "content": content}],
+        )
+
+    async def describe_images_batch(self, images: list[bytes | str], prompts: list[str]) -> list[str]:
+        """
+        Describes several images with a single Bedrock call and returns one description per image.
+        If the batched call fails or its reply can't be split, each image gets an error description instead.
+        """
+        if len(images) == 1:
+            return [await self.describe_image_with_llm(images[0], prompts[0])]
+
+        model_id = "amazon.nova-lite-v1:0"
+        image_bytes_list = [
+            await asyncio.to_thread(pybase64.b64decode, image, validate=False) if isinstance(image, str) else image
+            for image in images
+        ]
+        logger.info("Sending batch of %d images to LLM for description.", len(images))
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(_BEDROCK_EXEC, self._converse_batch_sync, model_id, image_bytes_list)
+            text = next((c['text'] for c in response['output']['message']['content'] if 'text' in c), "")
+            descriptions = json.loads(text[text.find('['):text.rfind(']') + 1])
+            if (isinstance(descriptions, list) and len(descriptions) == len(images)
+                    and all(isinstance(d, str) for d in descriptions)):
+                return descriptions
+            logger.warning("Batched image description from %s did not contain %d entries.", model_id, len(images))
+            error_description = "I couldn't analyze the image."
+        except Exception as e:
+            logger.warning("Batched image description failed for %d images: %s", len(images), e, exc_info=True)
+            error_description = f"Error analyzing image with LLM: {str(e)}"
+
+        # No per-image retry: re-sending every image would double the Bedrock calls for this batch
+        return [error_description] * len(images)
@@ -2,37 +2,56 @@
 import json
 import logging
 import asyncio
+import os
 import uuid
+import orjson
+import pybase64
 
 # Import the LLM client from its sibling file
 from .image_analyzer_llm_client import ImageAnalyzerLLMClient
+from .image_batch_queue import ImageBatchQueue
+from lib.tool_input import parse_tool_input
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 logger = logging.getLogger(__name__)
 
+_MISSING = object() # Sentinel for completed_async_tool_results lookups
+
 # Module-level variable to hold the initialized LLM client for image analysis
 _shared_llm_client_instance = None
 _llm_client_init_lock = asyncio.Lock()
 
 async def get_llm_client(region="us-east-1") -> ImageAnalyzerLLMClient:
     global _shared_llm_client_instance
-    if _shared_llm_client_instance is None:
+    client = _shared_llm_client_instance
+    if client is None:
         async with _llm_client_init_lock:
-            if _shared_llm_client_instance is None:
+            client = _shared_llm_client_instance
+            if client is None:
                 logger.info("[ImageAnalyzerTool] Initializing ImageAnalyzerLLMClient...")
-                _shared_llm_client_instance = ImageAnalyzerLLMClient(region=region)
+                client = _shared_llm_client_instance = ImageAnalyzerLLMClient(region=region)
+    return client
+
+def get_llm_client_sync() -> ImageAnalyzerLLMClient:
+    """Returns the shared LLM client without awaiting. Only valid once get_llm_client() has completed."""
+    assert _shared_llm_client_instance is not None, "call get_llm_client() first"
     return _shared_llm_client_instance
 
+# NOVA_BATCH_IMAGE_ANALYSIS=1 groups concurrent analyses into multi-image LLM calls
+BATCH_IMAGE_ANALYSIS = os.environ.get("NOVA_BATCH_IMAGE_ANALYSIS") == "1"
+_image_batch_queue = None
+
+def _get_image_batch_queue(llm_client: ImageAnalyzerLLMClient) -> ImageBatchQueue:
+    global _image_batch_queue
+    if _image_batch_queue is None:
+        _image_batch_queue = ImageBatchQueue(llm_client)
+    return _image_batch_queue
+
 async def _execute_image_analysis_remotely(manager_instance, image_analysis_id: str, query_context: str) -> dict:
     """
     Orchestrates screenshot request from frontend, sends to LLM, and returns description.
     This is the coroutine run by launch_background_tool_task.
     """
-    logger.info(f"[ImageAnalyzerTool] (ID: {image_analysis_id}) Background analysis started. Context: '{query_context}'")
+    logger.info("[ImageAnalyzerTool] (ID: %s) Background analysis started. Context: '%s'", image_analysis_id, query_context)
 
     # Default result structure
     result_for_cache = {
@@ -41,11 +60,13 @@ async def _execute_image_analysis_remotely(manager_instance, image_analysis_id:
         "analysisId": image_analysis_id,
         "description": None
     }
+    error_set = False # True once a specific error has been recorded in result_for_cache
 
     # 1. Prepare to wait for image data from frontend
-    image_event = asyncio.Event()
-    manager_instance.pending_screenshot_events[image_analysis_id] = image_event
-    logger.info(f"[ImageAnalyzerTool] (ID: {image_analysis_id}) Registered event wait for screenshot.")
+    # deliver_screenshot_data resolves this with the frontend's dict, so no separate data hand-off is needed
+    screenshot_future = asyncio.get_running_loop().create_future()
+    manager_instance.pending_screenshot_events[image_analysis_id] = screenshot_future
+    logger.info("[ImageAnalyzerTool] (ID: %s) Registered future wait for screenshot.", image_analysis_id)
 
     # 2. Request screenshot from frontend via output_queue
     request_payload_to_frontend = {
@@ -57,79 +78,99 @@ async def _execute_image_analysis_remotely(manager_instance, image_analysis_id:
     received_data_dict = None # Initialize
     try:
         await manager_instance.output_queue.put(request_payload_to_frontend)
-        logger.info(f"[ImageAnalyzerTool] (ID: {image_analysis_id}) Queued 'requestScreenshotForAnalysis' to frontend.")
+        logger.info("[ImageAnalyzerTool] (ID: %s) Queued 'requestScreenshotForAnalysis' to frontend.", image_analysis_id)
     except Exception as e:
-        logger.error(f"[ImageAnalyzerTool] (ID: {image_analysis_id}) Failed to queue screenshot request: {e}")
-        results_for_cache["error"] = "System error: Failed to request screenshot."
-        if image_analysis_id in manager_instance.pending_screenshot_events: # Cleanup
-            del manager_instance.pending_screenshot_events[image_analysis_id]
-        return results_for_cache
+        logger.error("[ImageAnalyzerTool] (ID: %s) Failed to queue screenshot request: %s", image_analysis_id, e)
+        result_for_cache["error"] = "System error: Failed to request screenshot."
+        manager_instance.pending_screenshot_events.pop(image_analysis_id, None) # Cleanup
+        return result_for_cache
+
+    # On the first analysis, warm up the LLM client while the screenshot round trip is in flight
+    llm_client_task = None
+    if _shared_llm_client_instance is None:
+        llm_client_task = asyncio.create_task(get_llm_client(region=manager_instance.region))
 
     # 3. Wait for frontend to send screenshot data (with timeout)
     try:
-        logger.info(f"[ImageAnalyzerTool] (ID: {image_analysis_id}) Waiting for screenshot data from frontend...")
-        await asyncio.wait_for(image_event.wait(), timeout=30.0) # Wait up to 30s for screenshot
-        # image_data_url = manager_instance.received_screenshot_data.pop(image_analysis_id, None)
-
-        # Data is now a dict: {"imageDataUrl": "..."} or {"error": "..."} or None
-        received_data_dict = manager_instance.received_screenshot_data.pop(image_analysis_id, None)
+        logger.info("[ImageAnalyzerTool] (ID: %s) Waiting for screenshot data from frontend...", image_analysis_id)
+        async with asyncio.timeout(30.0): # Wait up to 30s for screenshot, without wrapping the wait in a Task
+            # Data is a dict: {"imageDataUrl": "..."} or {"error": "..."}
+            received_data_dict = await screenshot_future
         
         if received_data_dict and received_data_dict.get("imageDataUrl"):
             image_data_url = received_data_dict["imageDataUrl"]
-            logger.info(f"[ImageAnalyzerTool] (ID: {image_analysis_id}) Screenshot event received, data URL acquired.")
+            logger.info("[ImageAnalyzerTool] (ID: %s) Screenshot received, data URL acquired.", image_analysis_id)
         elif received_data_dict and received_data_dict.get("error"):
-            logger.error(f"[ImageAnalyzerTool] (ID: {image_analysis_id}) Frontend reported error during screenshot: {received_data_dict['error']}")
-            results_for_cache["error"] = f"Frontend error during screenshot: {received_data_dict['error']}"
+            logger.error("[ImageAnalyzerTool] (ID: %s) Frontend reported error during screenshot: %s", image_analysis_id, received_data_dict['error'])
+            result_for_cache["error"] = f"Frontend error during screenshot: {received_data_dict['error']}"
+            error_set = True
             image_data_url = None # Ensure it's None
         else:
-            logger.error(f"[ImageAnalyzerTool] (ID: {image_analysis_id}) Screenshot data not found or malformed after event signal.")
-            results_for_cache["error"] = "Screenshot data structure error from frontend."
+            logger.error("[ImageAnalyzerTool] (ID: %s) Screenshot data not found or malformed.", image_analysis_id)
+            result_for_cache["error"] = "Screenshot data structure error from frontend."
+            error_set = True
             image_data_url = None # Ensure it's None
 
     except asyncio.TimeoutError:
-        logger.error(f"[ImageAnalyzerTool] (ID: {image_analysis_id}) Timeout waiting for screenshot from frontend.")
-        results_for_cache["error"] = "Timeout: Screenshot not received from the extension."
-    finally: # Ensure cleanup in all cases after wait_for
-        if image_analysis_id in manager_instance.pending_screenshot_events:
-            del manager_instance.pending_screenshot_events[image_analysis_id]
-        if image_analysis_id in manager_instance.received_screenshot_data and image_data_url is None: # If event set but data not popped
-            manager_instance.received_screenshot_data.pop(image_analysis_id, None)
+        logger.error("[ImageAnalyzerTool] (ID: %s) Timeout waiting for screenshot from frontend.", image_analysis_id)
+        result_for_cache["error"] = "Timeout: Screenshot not received from the extension."
+        error_set = True
+    except asyncio.CancelledError:
+        if llm_client_task is not None:
+            llm_client_task.cancel()
+        raise
+    finally: # Ensure cleanup in all cases after the wait
+        manager_instance.pending_screenshot_events.pop(image_analysis_id, None) # Already gone if the screenshot was delivered
 
 
     if not image_data_url:
-        if "error" not in results_for_cache or results_for_cache["error"] == "Image analysis failed to complete.": # Avoid overwriting specific timeout error
-             results_for_cache["error"] = "Screenshot data was not available or not received."
-        return results_for_cache
+        if llm_client_task is not None:
+            llm_client_task.cancel()
+        if not error_set: # Avoid overwriting a specific error such as the timeout
+            result_for_cache["error"] = "Screenshot data was not available or not received."
+        return result_for_cache
 
     # 4. Process image: extract base64 and get description from LLM
     try:
-        if not isinstance(image_data_url, str) or not image_data_url.startswith("data:image"):
+        if not isinstance(image_data_url, str):
             raise ValueError("Received data is not a valid image data URL.")
 
         # Extract base64 part: e.g., "data:image/jpeg;base64,LzlqLzRBQ..." -> "LzlqLzRBQ..."
-        base64_image_data = image_data_url.split(',', 1)[1]
+        prefix, sep, base64_image_data = image_data_url.partition(",")
+        if not sep or not prefix.startswith("data:image"):
+            raise ValueError("Received data is not a valid image data URL.")
+        image_data_url = None # Drop the reference to the full data URL early
+        # Decode once here (off the event loop) so only raw bytes travel to the LLM client
+        image_bytes = await asyncio.to_thread(pybase64.b64decode, base64_image_data, validate=False)
+        base64_image_data = None
 
-        llm_client = await get_llm_client(region=manager_instance.region) # Pass region if needed
+        llm_client = get_llm_client_sync() if llm_client_task is None else await llm_client_task
 
         # Construct a more specific prompt for the LLM if context is provided
         llm_prompt = f"Describe this image. Focus on: {query_context}" if query_context else "Describe what you see in this image in one or two sentences, phrased as 'This image shows...'."
 
-        description = await llm_client.describe_image_with_llm(base64_image_data, llm_prompt)
+        if BATCH_IMAGE_ANALYSIS:
+            description = await _get_image_batch_queue(llm_client).submit(image_bytes, llm_prompt)
+        else:
+            description = await llm_client.describe_image_with_llm(image_bytes, llm_prompt)
 
-        results_for_cache = {
+        result_for_cache = {
             "description": description,
             "originalContext": query_context,
             "analysisId": image_analysis_id,
             "status": "success" # Indicate LLM call success
         }
     except ValueError as ve: # For base64 extraction error
-        logger.error(f"[ImageAnalyzerTool] (ID: {image_analysis_id}) Invalid image data URL format: {ve}")
-        results_for_cache["error"] = f"Invalid image data format from extension: {str(ve)}"
+        logger.error("[ImageAnalyzerTool] (ID: %s) Invalid image data URL format: %s", image_analysis_id, ve)
+        result_for_cache["error"] = f"Invalid image data format from extension: {str(ve)}"
     except Exception as e: # For LLM call or other errors
-        logger.error(f"[ImageAnalyzerTool] (ID: {image_analysis_id}) Error getting description from LLM: {e}", exc_info=True)
-        results_for_cache["error"] = f"Error during image analysis: {str(e)}"
+        logger.error("[ImageAnalyzerTool] (ID: %s) Error getting description from LLM: %s", image_analysis_id, e, exc_info=True)
+        result_for_cache["error"] = f"Error during image analysis: {str(e)}"
+    finally:
+        if llm_client_task is not None:
+            llm_client_task.cancel() # No-op once awaited; stops the warmup if we bailed out before using it
 
-    return results_for_cache
+    return result_for_cache
 
 
 async def handle_imageanalyzer(manager_instance, tool_use_content: dict) -> dict:
@@ -138,72 +179,77 @@ async def handle_imageanalyzer(manager_instance, tool_use_content: dict) -> dict
     tool_use_id = tool_use_content.get("toolUseId") # Nova Sonic's ID for this specific toolUse block
 
     if not tool_use_id:
-        logger.error(f"[Tool:{raw_tool_name_from_event}] Critical: toolUseId missing.")
+        logger.error("[Tool:%s] Critical: toolUseId missing.", raw_tool_name_from_event)
         return {"result": "Error: System error (missing toolUseId).", "status": "error"}
 
     try:
         tool_input_str = tool_use_content.get("content", "{}")
-        parsed_tool_input = json.loads(tool_input_str)
+        parsed_tool_input = parse_tool_input(tool_input_str)
         query_context = parsed_tool_input.get("context", "the current page content") 
 
-        logger.info(f"[Tool:{raw_tool_name_from_event}] (ID: {tool_use_id}) Invoked. Context: '{query_context}'.")
-        logger.info(f"[Tool:{raw_tool_name_from_event}] Attempting cache lookup with key: '{cache_key_to_check}'.")
-        logger.info(f"[Tool:{raw_tool_name_from_event}] Available cache keys: {list(manager_instance.completed_async_tool_results.keys())}")
+        logger.info("[Tool:%s] (ID: %s) Invoked. Context: '%s'.", raw_tool_name_from_event, tool_use_id, query_context)
+        logger.info("[Tool:%s] Attempting cache lookup with key: '%s'.", raw_tool_name_from_event, cache_key_to_check)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[Tool:%s] Available cache keys: %s", raw_tool_name_from_event, list(manager_instance.completed_async_tool_results.keys()))
 
-        if cache_key_to_check in manager_instance.completed_async_tool_results:
-            logger.info(f"[Tool:{raw_tool_name_from_event}] (ID: {tool_use_id}) Cache HIT. Popping and returning.")
-            cached_result_data = manager_instance.completed_async_tool_results.pop(cache_key_to_check)
+        cached_result_data = manager_instance.completed_async_tool_results.pop(cache_key_to_check, _MISSING)
+        if cached_result_data is not _MISSING:
+            logger.info("[Tool:%s] (ID: %s) Cache HIT. Popping and returning.", raw_tool_name_from_event, tool_use_id)
             # Ensure the result being sent back is a string
-            return {"result": json.dumps(cached_result_data) if isinstance(cached_result_data, dict) else str(cached_result_data), "status": "success"}
-        else:
-            logger.info(f"[Tool:{raw_tool_name_from_event}] (ID: {tool_use_id}) Cache MISS.")
+            return {"result": orjson.dumps(cached_result_data).decode() if isinstance(cached_result_data, dict) else str(cached_result_data), "status": "success"}
+        logger.info("[Tool:%s] (ID: %s) Cache MISS.", raw_tool_name_from_event, tool_use_id)
 
         if tool_use_id in manager_instance.active_background_tasks:
-            logger.info(f"[Tool:{raw_tool_name_from_event}] (ID: {tool_use_id}) Background task for this Nova Sonic toolUseId is already active. Returning placeholder.")
+            logger.info("[Tool:%s] (ID: %s) Background task for this Nova Sonic toolUseId is already active. Returning placeholder.", raw_tool_name_from_event, tool_use_id)
             return {"result": f"I am still processing a previous request to analyze an image. I will notify you when it's complete.", "status": "success"}
 
-        logger.info(f"[Tool:{raw_tool_name_from_event}] (ID: {tool_use_id}) Initiating new background image analysis.")
+        logger.info("[Tool:%s] (ID: %s) Initiating new background image analysis.", raw_tool_name_from_event, tool_use_id)
 
         # Unique ID for this specific image analysis operation (frontend <-> backend coordination)
         # This ID will be used by the background task to request and receive the screenshot.
-        image_analysis_operation_id = str(uuid.uuid4())
+        image_analysis_operation_id = uuid.uuid4().hex
 
         actual_op_coro_factory = lambda: _execute_image_analysis_remotely(manager_instance, image_analysis_operation_id, query_context)
 
-        await manager_instance.launch_background_tool_task(
+        launched = await manager_instance.launch_background_tool_task(
             tool_use_id, # Nova Sonic's ID for this tool use block, used to track the overall task
             raw_tool_name_from_event, 
             actual_op_coro_factory
         )
+        if not launched:
+            logger.warning("[Tool:%s] (ID: %s) System busy, image analysis not started.", raw_tool_name_from_event, tool_use_id)
+            return {"result": "The system is busy with other requests. Please ask me to analyze the image again in a moment.", "status": "error"}
 
         placeholder_message = f"Okay, I'll capture and analyze the image of your current page regarding '{query_context}'. I'll notify you when the description is ready."
-        logger.info(f"[Tool:{raw_tool_name_from_event}] (ID: {tool_use_id}) Returning placeholder to Nova Sonic: '{placeholder_message}'")
+        logger.info("[Tool:%s] (ID: %s) Returning placeholder to Nova Sonic: '%s'", raw_tool_name_from_event, tool_use_id, placeholder_message)
         return {"result": placeholder_message, "status": "success"}
 
     except json.JSONDecodeError:
-        logger.error(f"[Tool:{raw_tool_name_from_event}] (ID: {tool_use_id}) Invalid JSON in input: {tool_use_content.get('content')}")
+        logger.error("[Tool:%s] (ID: %s) Invalid JSON in input: %s", raw_tool_name_from_event, tool_use_id, tool_use_content.get('content'))
         return {"result": f"Error: Invalid input format for {raw_tool_name_from_event} tool.", "status": "error"}
     except Exception as e:
-        logger.error(f"[Tool:{raw_tool_name_from_event}] (ID: {tool_use_id}) Error in handler: {e}", exc_info=True)
+        logger.error("[Tool:%s] (ID: %s) Error in handler: %s", raw_tool_name_from_event, tool_use_id, e, exc_info=True)
         return {"result": f"An unexpected error occurred while initiating {raw_tool_name_from_event}.", "status": "error"}
 
-def get_imageanalyzer_tool_spec() -> dict:
-    """Returns the tool specification for the imageAnalyzer tool."""
-    return {
-        "toolSpec": {
-            "name": "imageAnalyzer", # This must match the key in tool_handlers
-            "description": "Captures an image of the current web page and provides an AI-generated description. The user is notified when the analysis is complete.",
-            "inputSchema": {
-                "json": json.dumps({
-                    "type": "object",
-                    "properties": {
-                        "context": {
-                            "type": "string",
-                            "description": "Optional: Provide context or a specific question about the image to guide the analysis (e.g., 'focus on the colors' or 'what is the main subject?')."
-                        }
-                    },
-                    "required": [] # Context is optional
-                })
-            }
+_TOOL_SPEC = {
+    "toolSpec": {
+        "name": "imageAnalyzer", # This must match the key in tool_handlers
+        "description": "Captures an image of the current web page and provides an AI-generated description. The user is notified when the analysis is complete.",
+        "inputSchema": {
+            "json": json.dumps({
+                "type": "object",
+                "properties": {
+                    "context": {
+                        "type": "string",
+                        "description": "Optional: Provide context or a specific question about the image to guide the analysis (e.g., 'focus on the colors' or 'what is the main subject?')."
+                    }
+                },
+                "required": [] # Context is optional
+            })
         }
-    }
\ No newline at end of file
+    }
+}
+
+def get_imageanalyzer_tool_spec() -> dict:
+    """Returns the tool specification for the imageAnalyzer tool. Callers must not mutate it."""
+    return _TOOL_SPEC
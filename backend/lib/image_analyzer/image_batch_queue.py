@@ -0,0 +1,66 @@
+# backend/lib/image_analyzer/image_batch_queue.py
+import asyncio
+import logging
+
+from .image_analyzer_llm_client import ImageAnalyzerLLMClient
+
+logger = logging.getLogger(__name__)
+
+class ImageBatchQueue:
+    """
+    Collects image-description requests that arrive within max_wait_time of each other
+    (up to max_batch_size) and sends each group to the LLM as a single multi-image call.
+    """
+
+    def __init__(self, llm_client: ImageAnalyzerLLMClient, max_batch_size: int = 4, max_wait_time: float = 0.15):
+        self.llm_client = llm_client
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+        self._queue = asyncio.Queue()
+        self._process_task = None
+        self._batch_tasks = set() # Strong refs so in-flight batch tasks aren't garbage collected
+
+    async def submit(self, image: bytes | str, prompt_text: str) -> str:
+        """Queue an image for description and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, prompt_text, future))
+        if self._process_task is None or self._process_task.done():
+            self._process_task = asyncio.create_task(self._process_loop())
+        return await future
+
+    async def _collect_batch(self) -> list:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_time
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _process_loop(self):
+        while True:
+            batch = await self._collect_batch()
+            # Run each batch on its own task so the next one can be collected meanwhile
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: list):
+        images = [image for image, _, _ in batch]
+        prompts = [prompt for _, prompt, _ in batch]
+        logger.info("[ImageBatchQueue] Describing batch of %d image(s).", len(batch))
+        try:
+            descriptions = await self.llm_client.describe_images_batch(images, prompts)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), description in zip(batch, descriptions):
+            if not future.done():
+                future.set_result(description)
@@ -1,10 +1,15 @@
 # backend/tools/number_race_tool.py
 import json
+import asyncio
 import logging
-import time
+
+from lib.tool_input import parse_tool_input
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on the race duration so a huge number can't park a task indefinitely
+MAX_WAIT_SECONDS = 300
+
 def is_integer(value):
     try:
         int(value)
@@ -16,7 +21,7 @@ async def handle_number_race(tool_use_content: dict) -> dict:
     """Handles the 'numberRace' tool request."""
     try:
         tool_input_str = tool_use_content.get("content", "{}")
-        parsed_tool_input = json.loads(tool_input_str)
+        parsed_tool_input = parse_tool_input(tool_input_str)
         number = parsed_tool_input.get("number") # Keep as is, might be string or int from JSON
 
         logger.info(f"[Tool:numberRace] Called with input: {number}")
@@ -26,12 +31,12 @@ async def handle_number_race(tool_use_content: dict) -> dict:
              return {"result": "No number was provided for the race.", "status": "error"}
 
         if is_integer(str(number)): # Convert to string for is_integer robustness
-            num_val = int(number)
+            # Clamp to [0, MAX_WAIT_SECONDS] and report the wait that actually happens
+            num_val = max(0, min(int(number), MAX_WAIT_SECONDS))
             logger.info(f"[Tool:numberRace] Starting sleep for {num_val} seconds.")
-            # Note: time.sleep() is blocking. For a truly async app,
-            # you'd use asyncio.sleep() if this were a real I/O bound wait.
-            # Since this is just a demo tool, time.sleep() is fine to simulate work.
-            time.sleep(num_val)
+            # asyncio.sleep() yields to the event loop, so the Nova Sonic stream and
+            # other tools keep running while this one waits.
+            await asyncio.sleep(num_val)
             logger.info(f"[Tool:numberRace] Finished waiting for {num_val} seconds.")
             return {
                 "result": f"I am done waiting for {num_val} seconds.",
@@ -50,26 +55,28 @@ async def handle_number_race(tool_use_content: dict) -> dict:
         logger.error(f"[Tool:numberRace] Error processing: {e}", exc_info=True)
         return {"result": "An unexpected error occurred in the numberRace tool.", "status": "error"}
 
-def get_number_race_tool_spec() -> dict:
-    """Returns the tool specification for the numberRace tool."""
-    return {
-        "toolSpec": {
-            "name": "numberRace",
-            "description": "A number, an integer to start a number race! I will wait for that many seconds.",
-            "inputSchema": {
-                "json": json.dumps({
-                    "type": "object",
-                    "properties": {
-                        "number": {
-                            # Nova Sonic might send it as a string if user says "five",
-                            # but schema can still guide it towards expecting a number-like value.
-                            # The handler `is_integer` will validate.
-                            "type": "integer", # Or "number" if decimals were allowed by the tool
-                            "description": "The integer number of seconds to wait."
-                        }
-                    },
-                    "required": ["number"]
-                })
-            }
+_TOOL_SPEC = {
+    "toolSpec": {
+        "name": "numberRace",
+        "description": "A number, an integer to start a number race! I will wait for that many seconds.",
+        "inputSchema": {
+            "json": json.dumps({
+                "type": "object",
+                "properties": {
+                    "number": {
+                        # Nova Sonic might send it as a string if user says "five",
+                        # but schema can still guide it towards expecting a number-like value.
+                        # The handler `is_integer` will validate.
+                        "type": "integer", # Or "number" if decimals were allowed by the tool
+                        "description": "The integer number of seconds to wait."
+                    }
+                },
+                "required": ["number"]
+            })
         }
-    }
\ No newline at end of file
+    }
+}
+
+def get_number_race_tool_spec() -> dict:
+    """Returns the tool specification for the numberRace tool. Callers must not mutate it."""
+    return _TOOL_SPEC
@@ -0,0 +1,18 @@
+# backend/lib/tool_input.py
+from collections.abc import Mapping
+from types import MappingProxyType
+
+import orjson
+
+# Shared read-only result for the common empty-input case
+_EMPTY_INPUT: Mapping = MappingProxyType({})
+
+def parse_tool_input(tool_input_str: str | None) -> Mapping:
+    """
+    Parses the JSON 'content' string of a toolUse event.
+    Empty or '{}' content skips the parser and returns a shared read-only mapping.
+    Raises json.JSONDecodeError (via orjson.JSONDecodeError) on invalid input.
+    """
+    if not tool_input_str or tool_input_str == "{}":
+        return _EMPTY_INPUT
+    return orjson.loads(tool_input_str)
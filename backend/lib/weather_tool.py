@@ -1,19 +1,28 @@
 # backend/tools/weather_tool.py
 import re
 import json
+import asyncio
 import logging
-from strands import Agent
-from strands_tools import http_request
+import threading
+from typing import Optional
+import httpx
+from cachetools import TTLCache
+from strands import Agent, tool
 from strands.models import BedrockModel
 from strands.handlers.callback_handler import null_callback_handler 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+from lib.tool_input import parse_tool_input
+
 logger = logging.getLogger(__name__)
 
+# Strips the model's <thinking> blocks, which may span several lines
+_THINKING_RE = re.compile(r"<thinking>.*?</thinking>", re.DOTALL)
+
+# Recent forecasts keyed by normalized location; repeat asks skip the Bedrock + NWS round trips
+_weather_cache = TTLCache(maxsize=256, ttl=600)
+# Lookups currently running, keyed like the cache; concurrent asks for the same place share one task
+_weather_inflight: dict[str, asyncio.Task] = {}
+
 # Define a weather-focused system prompt
 WEATHER_SYSTEM_PROMPT = """You are a weather assistant with HTTP capabilities. You can:
 
@@ -36,21 +45,99 @@ When displaying responses:
 Always explain the weather conditions clearly and provide context for the forecast.
 """
 
-# Create a Bedrock model instance
-bedrock_model = BedrockModel(
-    # model_id="us.amazon.nova-lite-v1:0",
-    model_id="us.amazon.nova-micro-v1:0",
-    temperature=0.2,
-    top_p=0.9,
-)
-
-# Create an agent with HTTP capabilities
-weather_agent = Agent(
-    model=bedrock_model,
-    system_prompt=WEATHER_SYSTEM_PROMPT,
-    tools=[http_request],  # Explicitly enable http_request tool
-    callback_handler=null_callback_handler
-)
+NWS_BASE_URL = "https://api.weather.gov/"
+NWS_USER_AGENT = "NovaSonicDemo weather tool"
+
+# Keep-alive pool shared by every weather lookup, so the /points and forecast calls reuse one TLS session
+_nws_http_client: Optional[httpx.Client] = None
+_nws_http_client_lock = threading.Lock()
+
+def _get_nws_http_client() -> httpx.Client:
+    global _nws_http_client
+    if _nws_http_client is None:
+        with _nws_http_client_lock:
+            if _nws_http_client is None:
+                _nws_http_client = httpx.Client(
+                    http2=True,
+                    timeout=httpx.Timeout(15.0),
+                    limits=httpx.Limits(max_keepalive_connections=32, max_connections=32, keepalive_expiry=60),
+                    headers={"User-Agent": NWS_USER_AGENT, "Accept": "application/geo+json"},
+                )
+    return _nws_http_client
+
+@tool
+def http_request(url: str) -> str:
+    """
+    Sends an HTTP GET request to the National Weather Service API and returns the response body.
+
+    Args:
+        url: Full https://api.weather.gov/ URL, e.g. a /points/{latitude},{longitude} URL or a forecast URL it returned.
+    """
+    if not url.startswith(NWS_BASE_URL):
+        return f"Error: only {NWS_BASE_URL} URLs are supported."
+    try:
+        response = _get_nws_http_client().get(url)
+    except httpx.HTTPError as e:
+        return f"Error: request to {url} failed: {e}"
+    if response.is_error:
+        return f"Error: {url} returned HTTP {response.status_code}: {response.text}"
+    return response.text
+
+# The Bedrock model is built on first use, so importing this module stays cheap
+_weather_model: Optional[BedrockModel] = None
+_weather_model_lock = asyncio.Lock()
+
+async def _get_weather_model() -> BedrockModel:
+    global _weather_model
+    if _weather_model is None:
+        async with _weather_model_lock:
+            if _weather_model is None:
+                logger.info("[Tool:getWeather] Initializing weather model...")
+                # Create a Bedrock model instance
+                _weather_model = BedrockModel(
+                    # model_id="us.amazon.nova-lite-v1:0",
+                    model_id="us.amazon.nova-micro-v1:0",
+                    temperature=0.2,
+                    top_p=0.9,
+                )
+    return _weather_model
+
+def _query_weather_agent(bedrock_model: BedrockModel, location: str) -> str:
+    """Runs a weather agent for a location and returns its answer without <thinking> blocks."""
+    # A fresh Agent per lookup: Agents keep conversation history and are not thread-safe,
+    # while lookups for different locations run in worker threads at the same time
+    weather_agent = Agent(
+        model=bedrock_model,
+        system_prompt=WEATHER_SYSTEM_PROMPT,
+        tools=[http_request],  # Explicitly enable http_request tool
+        callback_handler=null_callback_handler
+    )
+    response = weather_agent(f"Get the current weather for {location}")
+
+    logger.info(response.message)
+    logger.info(response.metrics)        
+    result = response.message['content'][0]
+    
+    return _THINKING_RE.sub("", result['text'])
+
+async def _lookup_weather(cache_key: str, location: str) -> str:
+    """
+    Runs one weather lookup and caches the answer. Runs as its own task rather than inside a caller,
+    so a session that disconnects (and is cancelled) cannot fail or waste the lookup for the others.
+    """
+    try:
+        bedrock_model = await _get_weather_model()
+        # The Strands agent call is blocking (Bedrock + HTTP); keep it off the event loop
+        output_text = await asyncio.to_thread(_query_weather_agent, bedrock_model, location)
+        _weather_cache[cache_key] = output_text
+        return output_text
+    finally:
+        _weather_inflight.pop(cache_key, None)
+
+def _consume_lookup_exception(task: asyncio.Task) -> None:
+    # Callers re-raise failures themselves; this avoids "exception never retrieved" if they all left
+    if not task.cancelled():
+        task.exception()
 
 async def handle_get_weather(tool_use_content: dict) -> dict:
     """
@@ -58,19 +145,28 @@ async def handle_get_weather(tool_use_content: dict) -> dict:
     The input tool_use_content is the full 'toolUse' event content from Nova Sonic.
     For now, returns a static weather report.
     """
+    location = "the specified location" # Used in the error message if parsing never got this far
     try:
         # The 'content' field within tool_use_content is a JSON string, parse it
         tool_input_str = tool_use_content.get("content", "{}")
-        parsed_tool_input = json.loads(tool_input_str)
+        parsed_tool_input = parse_tool_input(tool_input_str)
         location = parsed_tool_input.get("location", "an unknown place")
         logger.info(f"[Tool:getWeather] Called for location: {location}")
-        response = weather_agent(f"Get on the current weather for {location}")
+        cache_key = location.strip().lower()
+        cached_text = _weather_cache.get(cache_key)
+        if cached_text is not None:
+            logger.info(f"[Tool:getWeather] Cache hit for location: {location}")
+            return {"result": cached_text, "status": "success"}
 
-        logger.info(response.message)
-        logger.info(response.metrics)        
-        result = response.message['content'][0]
-        
-        output_text = re.sub(r"<thinking>.*?</thinking>", "", result['text'])
+        # No await between the lookup and the insert, so this check-and-claim is atomic on the loop
+        inflight = _weather_inflight.get(cache_key)
+        if inflight is None:
+            inflight = _weather_inflight[cache_key] = asyncio.create_task(_lookup_weather(cache_key, location))
+            inflight.add_done_callback(_consume_lookup_exception)
+        else:
+            logger.info(f"[Tool:getWeather] Awaiting in-flight lookup for location: {location}")
+        # Shielded: cancelling this caller (its client left) must not cancel the shared lookup
+        output_text = await asyncio.shield(inflight)
         return {
             # "result": result['text'],
             "result": output_text,
@@ -84,39 +180,32 @@ async def handle_get_weather(tool_use_content: dict) -> dict:
         }
     except Exception as e:
         logger.error(f"[Tool:getWeather] Error processing tool_use_content {tool_use_content}: {e}", exc_info=True)
-        # Try to extract location even in case of other errors for a more informative message
-        location_for_error = "the specified location"
-        try:
-            tool_input_str_err = tool_use_content.get("content", "{}")
-            parsed_tool_input_err = json.loads(tool_input_str_err)
-            location_for_error = parsed_tool_input_err.get("location", "the specified location")
-        except:
-            pass # Ignore if parsing fails again
-
         return {
-            "result": f"Error getting weather for {location_for_error}.",
+            "result": f"Error getting weather for {location}.",
             "status": "error"
         }
 
-def get_weather_tool_spec() -> dict:
-    """Returns the tool specification for the getWeather tool for Nova Sonic."""
-    return {
-        # This is the outer structure Nova Sonic expects for each tool in the toolConfiguration.tools array
-        "toolSpec": {
-            "name": "getWeather",
-            "description": "Get current weather for a given location",
-            "inputSchema": {
-                # The inputSchema.json value must be a JSON *string*
-                "json": json.dumps({
-                    "type": "object",
-                    "properties": {
-                        "location": {
-                            "type": "string",
-                            "description": "Name of the city (e.g. Seattle, WA)"
-                        }
-                    },
-                    "required": ["location"]
-                })
-            }
+_TOOL_SPEC = {
+    # This is the outer structure Nova Sonic expects for each tool in the toolConfiguration.tools array
+    "toolSpec": {
+        "name": "getWeather",
+        "description": "Get current weather for a given location",
+        "inputSchema": {
+            # The inputSchema.json value must be a JSON *string*
+            "json": json.dumps({
+                "type": "object",
+                "properties": {
+                    "location": {
+                        "type": "string",
+                        "description": "Name of the city (e.g. Seattle, WA)"
+                    }
+                },
+                "required": ["location"]
+            })
         }
-    }
\ No newline at end of file
+    }
+}
+
+def get_weather_tool_spec() -> dict:
+    """Returns the tool specification for the getWeather tool for Nova Sonic. Callers must not mutate it."""
+    return _TOOL_SPEC
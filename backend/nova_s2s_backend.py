@@ -1,36 +1,34 @@
 import json
 import logging
 import os
+import re
 import uuid
 import warnings
 import asyncio
 import websockets
-import base64
-import time
+import binascii
+import math
 import numpy as np
+import orjson
+from collections import deque
 
 from lib.weather_tool import handle_get_weather, get_weather_tool_spec
 from lib.number_race_tool import handle_number_race, get_number_race_tool_spec 
 from lib.agent_search.agent_search_tool import handle_agent_search, get_agent_search_tool_spec 
 from lib.image_analyzer.image_analyzer_tool import handle_imageanalyzer, get_imageanalyzer_tool_spec
+from common.client.pool import close_all as close_a2a_clients
+
+try:
+    import uvloop
+except ImportError: # uvloop does not support Windows
+    uvloop = None
+from logging_setup import setup_logging
 
 
 # Configure logging
 LOGLEVEL = os.environ.get("LOGLEVEL", "INFO").upper()
-# logging.basicConfig(level=LOGLEVEL, format="%(asctime)s %(levelname)s: %(message)s")
-# Configure logging with a timestamp in the format
-logging.basicConfig(
-    # filename='./novas2s.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    force=True,
-    handlers=[
-        logging.FileHandler("debug.log"),
-        logging.StreamHandler()
-    ]
-    # filemode='w'  # 'w' to overwrite the file on each run, 'a' to append
-)
+# Records are queued and written by a background listener thread (debug.log + console)
+setup_logging(level=logging.INFO, log_file="debug.log")
 logger = logging.getLogger(__name__)
 
 # Suppress warnings
@@ -55,9 +53,69 @@ from smithy_aws_core.credentials_resolvers.environment import (
     EnvironmentCredentialsResolver,
 )
 
+# Limits for long-running background tools (agentSearch, imageAnalyzer)
+MAX_ACTIVE_BACKGROUND_TASKS = 8
+# Process-wide cap on background tool coroutines running at once, across all sessions
+MAX_CONCURRENT_TOOL_EXECUTIONS = 16
+_tool_execution_sem = asyncio.Semaphore(MAX_CONCURRENT_TOOL_EXECUTIONS)
+# Queued audio chunks merged into one audioInput event when the sender falls behind
+AUDIO_BATCH_MAX = 8
+# Audio chunks held while Bedrock is stalled; beyond this the oldest are dropped in favour of fresh audio
+AUDIO_INPUT_MAX_CHUNKS = 50
+# Messages buffered for the frontend; producers wait (backpressure) once it is full (NOVA_OUTPUT_QUEUE_MAXSIZE)
+OUTPUT_QUEUE_MAXSIZE = int(os.environ.get("NOVA_OUTPUT_QUEUE_MAXSIZE", "256"))
+# Frontend messages coalesced into one WebSocket frame when several are queued (NOVA_WS_BATCH_MAX=1 disables)
+WS_BATCH_MAX = int(os.environ.get("NOVA_WS_BATCH_MAX", "64"))
+WS_BATCH_BYTES = 16 * 1024 # Stop draining once a batch reaches this size
+# Bedrock responses above this size are JSON-parsed in a worker thread
+LARGE_RESPONSE_PARSE_BYTES = 32 * 1024
+# Tool-result content names generated per os.urandom call
+UUID_POOL_SIZE = 32
+# Seconds a new connection waits for the Bedrock stream handshake (NOVA_INIT_STREAM_TIMEOUT)
+INIT_STREAM_TIMEOUT = float(os.environ.get("NOVA_INIT_STREAM_TIMEOUT", "10"))
+# Bedrock streams opened ahead of time for new connections. Off by default: every idle stream is
+# replaced each STREAM_POOL_MAX_IDLE seconds, so even an idle server keeps opening streams.
+STREAM_POOL_SIZE = int(os.environ.get("NOVA_STREAM_POOL_SIZE", "0"))
+# Seconds a pre-opened stream may sit unused before it is replaced, ahead of Bedrock's own input timeout
+STREAM_POOL_MAX_IDLE = float(os.environ.get("NOVA_STREAM_POOL_MAX_IDLE", "30"))
+STREAM_POOL_RETRY_DELAY = 5.0 # Seconds between attempts after a failed pre-open
+# Bedrock stream errors that end the session and are reported to the frontend as fatal
+_FATAL_BEDROCK_ERROR_RE = re.compile(r"Invalid voice ID|ValidationException|Error\(s\):")
+# Bedrock audioOutput events are forwarded verbatim; this only inspects the start of the payload
+_AUDIO_OUTPUT_EVENT_RE = re.compile(rb'\s*\{\s*"event"\s*:\s*\{\s*"audioOutput"\s*:')
+
+def _rms_int16(buf):
+    """RMS of a PCM 16-bit buffer, normalized to [0, 1]; the sum of squares is a single BLAS dot product."""
+    if buf.size == 0:
+        return 0.0
+    samples = buf.astype(np.float32)
+    return math.sqrt(float(np.dot(samples, samples)) / buf.size) / 32768.0
+
+# One BedrockRuntimeClient per region for the whole process; each session opens its own stream on it
+_BEDROCK_CLIENTS: dict[str, BedrockRuntimeClient] = {}
+# Input-stream close tasks started by BedrockStreamManager.discard(), referenced until they finish
+_closing_streams: set[asyncio.Task] = set()
+
 class BedrockStreamManager:
     """Manages bidirectional streaming with AWS Bedrock using asyncio"""
 
+    # One instance per connected session; slots drop the per-instance __dict__.
+    # Every attribute assigned in this class must be listed here.
+    __slots__ = (
+        "model_id", "region", "last_credential_refresh",
+        "_audio_dq", "_audio_evt", "output_queue",
+        "response_task", "stream_response", "is_active", "bedrock_client",
+        "prompt_name", "content_name", "audio_content_name",
+        "toolUseContent", "toolUseId", "toolName",
+        "speech_detected", "speech_detection_enabled",
+        "_audio_event_key", "_audio_event_prefix", "_audio_event_suffix",
+        "_event_dispatch", "tool_handlers", "tool_specs_definitions",
+        "pending_tool_results", "active_background_tasks", "completed_async_tool_results",
+        "_active_background_count",
+        "pending_screenshot_events",
+        "_uuid_pool",
+    )
+
     def __init__(self, model_id="amazon.nova-sonic-v1:0", region="us-east-1"):
         """Initialize the stream manager."""
         self.model_id = model_id
@@ -65,8 +123,11 @@ class BedrockStreamManager:
         self.last_credential_refresh = 0
 
         # Audio and output queues
-        self.audio_input_queue = asyncio.Queue()
-        self.output_queue = asyncio.Queue() # For messages to frontend
+        # Audio input has one producer (the WebSocket handler) and one consumer, so a deque plus a
+        # wake-up Event is enough and avoids a Future per put/get
+        self._audio_dq = deque(maxlen=AUDIO_INPUT_MAX_CHUNKS) # Full deque drops its oldest chunk on append
+        self._audio_evt = asyncio.Event()
+        self.output_queue = asyncio.Queue(maxsize=OUTPUT_QUEUE_MAXSIZE) # For messages to frontend
 
         self.response_task = None
         self.stream_response = None
@@ -83,14 +144,30 @@ class BedrockStreamManager:
       
         # Speech detection
         self.speech_detected = False # Not currently used to gate sending
+        self.speech_detection_enabled = False # RMS detection is skipped on the audio path unless enabled
+
+        # Pre-serialized audioInput JSON around the content field, for the current (promptName, contentName)
+        self._audio_event_key = None
+        self._audio_event_prefix = b""
+        self._audio_event_suffix = b""
+
+        # Bedrock event key -> handler for the response loop; audioOutput needs no handling
+        self._event_dispatch = {
+            "contentStart": self._on_content_start,
+            "textOutput": self._on_text_output,
+            "toolUse": self._on_tool_use,
+            "contentEnd": self._on_content_end,
+        }
 
+        # Lowercased tool name -> (handler, needs_manager). Handlers that spawn background tasks
+        # managed by this instance take it as their first argument.
         self.tool_handlers = {
-            "getweather": handle_get_weather,
-            "numberrace": handle_number_race,
-            "agentsearch": handle_agent_search,
-            "imageanalyzer": handle_imageanalyzer,
+            "getweather": (handle_get_weather, False),
+            "numberrace": (handle_number_race, False),
+            "agentsearch": (handle_agent_search, True),
+            "imageanalyzer": (handle_imageanalyzer, True),
             # Register other tool handlers here as they are created
-            # e.g., "getbookofofferstool": handle_get_book_of_offers,
+            # e.g., "getbookofofferstool": (handle_get_book_of_offers, False),
         }
 
         # NEW: Tool Specifications (primarily for reference or potential future use by backend)
@@ -107,23 +184,28 @@ class BedrockStreamManager:
         # For async tool results and task management
         self.pending_tool_results = {}  # Key: toolUseId, Value: actual tool result dict
         self.active_background_tasks = {} # Key: toolUseId, Value: asyncio.Task
-        self.completed_async_tool_results = {}
-        self.pending_screenshot_events = {}  # Key: image_analysis_operation_id, Value: asyncio.Event
-        self.received_screenshot_data = {} # Key: image_analysis_operation_id, Value: imageDataUrl (string)        
+        self.completed_async_tool_results = {} # Key: lowercased tool name, so at most one entry per tool
+        self._active_background_count = 0 # Background tool tasks currently holding a slot
+        self.pending_screenshot_events = {}  # Key: image_analysis_operation_id, Value: asyncio.Future resolved with the screenshot dict
+        self._uuid_pool = deque() # Pre-generated content names for tool results, see _next_uuid
 
         logger.info(f"Initialized BedrockStreamManager with tool handlers: {list(self.tool_handlers.keys())}")       
 
     def _initialize_client(self):
-        """Initialize the Bedrock client."""
-        config = Config(
-            endpoint_uri=f"https://bedrock-runtime.{self.region}.amazonaws.com",
-            region=self.region,
-            aws_credentials_identity_resolver=EnvironmentCredentialsResolver(),
-            http_auth_scheme_resolver=HTTPAuthSchemeResolver(),
-            http_auth_schemes={"aws.auth#sigv4": SigV4AuthScheme()},
-        )
-        self.bedrock_client = BedrockRuntimeClient(config=config)
-        logger.info("BedrockRuntimeClient initialized.")
+        """Initialize the Bedrock client (shared by every session in the same region)."""
+        # Construction is synchronous, so this check-and-set can't interleave with another session's
+        client = _BEDROCK_CLIENTS.get(self.region)
+        if client is None:
+            config = Config(
+                endpoint_uri=f"https://bedrock-runtime.{self.region}.amazonaws.com",
+                region=self.region,
+                aws_credentials_identity_resolver=EnvironmentCredentialsResolver(),
+                http_auth_scheme_resolver=HTTPAuthSchemeResolver(),
+                http_auth_schemes={"aws.auth#sigv4": SigV4AuthScheme()},
+            )
+            client = _BEDROCK_CLIENTS[self.region] = BedrockRuntimeClient(config=config)
+            logger.info("BedrockRuntimeClient initialized.")
+        self.bedrock_client = client
 
     async def initialize_stream(self):
         """Initialize the bidirectional stream with Bedrock."""
@@ -165,59 +247,47 @@ class BedrockStreamManager:
             return
         
         # For all other events, continue with normal processing
-        # Convert to JSON string if it's a dict
+        # Serialize dicts straight to UTF-8 bytes
         if isinstance(event_data, dict):
-            event_json = json.dumps(event_data)
+            event_bytes = orjson.dumps(event_data)
         else:
-            event_json = event_data
+            event_bytes = event_data.encode("utf-8") if isinstance(event_data, str) else event_data
 
         # Create the event chunk
         event = InvokeModelWithBidirectionalStreamInputChunk(
-            value=BidirectionalInputPayloadPart(bytes_=event_json.encode("utf-8"))
+            value=BidirectionalInputPayloadPart(bytes_=event_bytes)
         )
 
         try:
             await self.stream_response.input_stream.send(event)
 
-            # Define event_type outside the conditional blocks
-            if isinstance(event_data, dict):
-                event_type = list(event_data.get("event", {}).keys())
-            else:
-                event_type = list(json.loads(event_json).get("event", {}).keys())
-
-            if len(event_json) > 200:
-                if (
-                    "audioInput" not in event_type
-                ):  # constant stream of audio inputs so we don't want to log them all
-                    logger.info(f"Sent event type: {event_type}")
-            else:
-                if (
-                    "audioInput" not in event_type
+            # Per-event logging; the event type is only worked out when DEBUG is on
+            if logger.isEnabledFor(logging.DEBUG):
+                sent_event = event_data if isinstance(event_data, dict) else orjson.loads(event_bytes)
+                ev = sent_event.get("event")
+                if not (
+                    ev and "audioInput" in ev
                 ):  # constant stream of audio inputs so we don't want to log them all
-                    logger.info(f"Sent event type: {event_type}")
+                    logger.debug("Sent event type: %s", next(iter(ev)) if ev else "unknown")
         except Exception as e:
             logger.error(f"Error sending event to Bedrock: {str(e)}", exc_info=True)
             # This could be a critical error, consider how to handle upstream
             # For now, it will likely break _process_responses or other interactions
 
-    def detect_speech_in_audio(self, audio_base64): # Not currently used for gating
+    def detect_speech_in_audio(self, audio_data): # Not currently used for gating
         """
         Detect if audio contains speech based on amplitude level.
+        audio_data is raw PCM bytes, as queued by add_audio_chunk.
         Returns True if speech is detected, False otherwise.
         """
         try:
-            # Decode base64 audio data
-            audio_bytes = base64.b64decode(audio_base64)
-            
             # Convert to numpy array, assuming PCM 16-bit audio
             # This is a simplified approach - adjust based on your actual audio format
-            audio_array = np.frombuffer(audio_bytes, dtype=np.int16)
-            
-            # Normalize to [-1, 1]
-            audio_array = audio_array.astype(np.float32) / 32768.0
+            # frombuffer is a view over the bytes, not a copy
+            audio_array = np.frombuffer(audio_data, dtype=np.int16)
             
-            # Calculate RMS amplitude
-            rms = np.sqrt(np.mean(np.square(audio_array)))
+            # Calculate RMS amplitude, normalized to [0, 1]
+            rms = _rms_int16(audio_array)
             
             # Define threshold for speech detection
             audio_level_threshold = 0.1  # Adjusted threshold, was 0.2 (too high for normalized)
@@ -237,44 +307,80 @@ class BedrockStreamManager:
             logger.error(f"Error detecting speech: {str(e)}")
             return False
 
+    def _coalesce_audio_chunks(self, batch):
+        """
+        Validates queued audio items and merges consecutive chunks for the same prompt/content
+        into one base64 payload. Items hold raw PCM bytes.
+        Returns a list of (prompt_name, content_name, audio_base64), with audio_base64 as bytes.
+        """
+        merged = []
+        for data in batch:
+            # Extract data from the queue item
+            prompt_name = data.get("prompt_name")
+            content_name = data.get("content_name")
+            audio_bytes = data.get("audio_bytes")
+
+            if not audio_bytes or not prompt_name or not content_name:
+                logger.info("Missing required audio data properties")
+                continue
+
+            # Check for speech in the audio using our internal method
+            if self.speech_detection_enabled:
+                self.detect_speech_in_audio(audio_bytes)
+
+            if merged and merged[-1][0] == prompt_name and merged[-1][1] == content_name:
+                merged[-1][2].append(audio_bytes)
+            else:
+                merged.append((prompt_name, content_name, [audio_bytes]))
+
+        # PCM is joined and base64-encoded once per run, just before it goes to Bedrock.
+        # The encoded bytes are JSON-safe and can be spliced in as-is.
+        return [
+            (prompt_name, content_name, binascii.b2a_base64(b"".join(chunks), newline=False))
+            for prompt_name, content_name, chunks in merged
+        ]
+
+    def _audio_event_affixes(self, prompt_name, content_name):
+        """Returns the serialized audioInput event split around its content value, rebuilt only when the names change."""
+        if self._audio_event_key != (prompt_name, content_name):
+            template = orjson.dumps({
+                "event": {
+                    "audioInput": {
+                        "promptName": prompt_name,
+                        "contentName": content_name,
+                        "role": "USER",
+                        "content": None,
+                    }
+                }
+            })
+            prefix, _, suffix = template.rpartition(b"null")
+            self._audio_event_key = (prompt_name, content_name)
+            self._audio_event_prefix = prefix
+            self._audio_event_suffix = suffix
+        return self._audio_event_prefix, self._audio_event_suffix
+
     async def _process_audio_input(self):
         """Process audio input from the queue and send to Bedrock."""
         while self.is_active:
             try:
-                # Get audio data from the queue
-                data = await self.audio_input_queue.get()
-
-                # Extract data from the queue item
-                prompt_name = data.get("prompt_name")
-                content_name = data.get("content_name")
-                audio_bytes = data.get("audio_bytes")
-
-                if not audio_bytes or not prompt_name or not content_name:
-                    logger.info("Missing required audio data properties")
+                # Sleep until add_audio_chunk signals; no await between the check and clear(), so no wake-up is lost
+                if not self._audio_dq:
+                    self._audio_evt.clear()
+                    await self._audio_evt.wait()
                     continue
 
-                # Check for speech in the audio using our internal method
-                if self.detect_speech_in_audio(audio_bytes):
-                    now = time.time()
-
-                # Create the audio input event
-                audio_event = {
-                    "event": {
-                        "audioInput": {
-                            "promptName": prompt_name,
-                            "contentName": content_name,
-                            "content": (
-                                audio_bytes.decode("utf-8")
-                                if isinstance(audio_bytes, bytes)
-                                else audio_bytes
-                            ),
-                            "role": "USER",
-                        }
-                    }
-                }
+                # Take everything already waiting, up to the batch limit
+                batch = []
+                while self._audio_dq and len(batch) < AUDIO_BATCH_MAX:
+                    batch.append(self._audio_dq.popleft())
 
-                # Send the event
-                await self.send_raw_event(audio_event)
+                for prompt_name, content_name, audio_content in self._coalesce_audio_chunks(batch):
+                    # Create the audio input event from the cached JSON prefix/suffix
+                    prefix, suffix = self._audio_event_affixes(prompt_name, content_name)
+                    audio_event = b"".join((prefix, b'"', audio_content, b'"', suffix))
+
+                    # Send the event
+                    await self.send_raw_event(audio_event)
 
             except asyncio.CancelledError:
                 break
@@ -283,17 +389,158 @@ class BedrockStreamManager:
 
     def add_audio_chunk(self, prompt_name, content_name, audio_data):
         """Add an audio chunk to the queue."""
-        # The audio_data is already a base64 string from the frontend
-        self.audio_input_queue.put_nowait(
+        # audio_data is raw PCM bytes; JSON audioInput events are base64-decoded before they get here
+        if len(self._audio_dq) == AUDIO_INPUT_MAX_CHUNKS:
+            logger.debug("Audio input backlog full, dropping the oldest chunk")
+        self._audio_dq.append(
             {
                 "prompt_name": prompt_name,
                 "content_name": content_name,
                 "audio_bytes": audio_data,
             }
         )
+        self._audio_evt.set()
+
+    def _next_uuid(self):
+        """Returns a random UUID4 string, generated in batches from a single os.urandom call."""
+        if not self._uuid_pool:
+            raw = os.urandom(16 * UUID_POOL_SIZE)
+            self._uuid_pool.extend(
+                str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, len(raw), 16)
+            )
+        return self._uuid_pool.popleft()
+
+    async def _on_content_start(self, content_start):
+        # Only diagnostics below, so skip the additionalModelFields parse unless DEBUG is on
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        logger.debug("Content start detected")
+        # Check for speculative content
+        if "additionalModelFields" in content_start:
+            try:
+                additional_fields = orjson.loads(
+                    content_start["additionalModelFields"]
+                )
+                if (
+                    additional_fields.get("generationStage")
+                    == "SPECULATIVE"
+                ):
+                    logger.debug(
+                        "Speculative content detected"
+                    )
+            except json.JSONDecodeError:
+                logger.error(
+                    "Error parsing additionalModelFields",
+                    exc_info=True,
+                )
+
+    async def _on_text_output(self, text_output):
+        role = text_output["role"]
+        if role == "ASSISTANT":
+            logger.debug("Assistant Message Redacted")
+            # here you could log the message for testing
+        elif role == "USER":
+            logger.debug("User Message Redacted")
+            # here you could log the message for testing
+
+    async def _on_tool_use(self, tool_use):
+        # Handle tool use detection
+        self.toolUseContent = tool_use
+        self.toolName = tool_use["toolName"]
+        self.toolUseId = tool_use["toolUseId"]
+        logger.info(
+            f"Tool use detected: {self.toolName}, ID: {self.toolUseId}"
+        )
+
+    async def _on_content_end(self, content_end):
+        # Process tool use when content ends
+        if content_end.get("type") != "TOOL":
+            return
+        logger.info(
+            "Processing tool use and sending result"
+        )
+
+        # Process the tool use
+        toolResult = await self.processToolUse(
+            self.toolName, self.toolUseContent
+        )
+
+        # Create a unique content name for this tool result
+        toolContent = self._next_uuid()
+
+        logger.info(f"Tool Use Id {toolContent}")
+
+        # Send tool start event
+        tool_start_event = {
+            "event": {
+                "contentStart": {
+                    "interactive": True,
+                    "promptName": self.prompt_name,
+                    "contentName": toolContent,
+                    "type": "TOOL",
+                    "role": "TOOL",
+                    "toolResultInputConfiguration": {
+                        "toolUseId": self.toolUseId,
+                        "type": "TEXT",
+                        "textInputConfiguration": {
+                            "mediaType": "text/plain"
+                        },
+                    },
+                }
+            }
+        }
+        await self.send_raw_event(tool_start_event)
+        logger.info("Sent Content Start for Tool Event")
+
+        # Send tool result event
+        if isinstance(toolResult, dict):
+            try:
+                content_json_string = orjson.dumps(toolResult).decode()
+                logger.info("JSON serialization successful:")
+            except TypeError as e:
+                logger.error(f"Error: JSON serialization failed: {e}")
+            except Exception as e:
+                logger.error(f"An unexpected error occurred: {e}")
+        else:
+            content_json_string = str(toolResult)
+
+        # check if tool use resulted in an error that needs to be reported to Sonic
+        status = (
+            "error"
+            if toolResult.get("status") == "error"
+            else "success"
+        )
+        # logger.info(f"Tool result {toolResult} and value of status is {status}")
+
+        tool_result_event = {
+            "event": {
+                "toolResult": {
+                    "promptName": self.prompt_name,
+                    "contentName": toolContent,
+                    "content": content_json_string,
+                    "status": status,
+                }
+            }
+        }
+
+        await self.send_raw_event(tool_result_event)
+        logger.info('Sent ToolResultEvent')
+
+
+        # Send tool content end event
+        tool_content_end_event = {
+            "event": {
+                "contentEnd": {
+                    "promptName": self.prompt_name,
+                    "contentName": toolContent,
+                }
+            }
+        }
+        await self.send_raw_event(tool_content_end_event)
 
     async def _process_responses(self):
         logger.info(f"Bedrock response processing task started for prompt: {self.prompt_name if self.prompt_name else 'N/A'}")
+        cancelled = False # Set when discard() stops this task; the client is gone by then
         try:
             while self.is_active:
                 try:
@@ -304,158 +551,31 @@ class BedrockStreamManager:
                     
                     result = await output_event[1].receive() # output_event is a tuple
                     if result.value and result.value.bytes_:
-                        response_data = result.value.bytes_.decode("utf-8")
+                        response_data = result.value.bytes_
+                        # Audio is the bulk of the traffic and needs no handling here: forward the raw JSON
+                        if _AUDIO_OUTPUT_EVENT_RE.match(response_data):
+                            await self.output_queue.put(response_data)
+                            continue
                         try:
-                            # response_data = result.value.bytes_.decode("utf-8")
-                            json_data = json.loads(response_data)
-
-                            # Handle different response types
-                            if "event" in json_data:
-                                event_data = json_data["event"]
-                                if "contentStart" in event_data:
-                                    logging.debug("Content start detected")
-                                    content_start = event_data["contentStart"]
-                                    # Check for speculative content
-                                    if "additionalModelFields" in content_start:
-                                        try:
-                                            additional_fields = json.loads(
-                                                content_start["additionalModelFields"]
-                                            )
-                                            if (
-                                                additional_fields.get("generationStage")
-                                                == "SPECULATIVE"
-                                            ):
-                                                logging.debug(
-                                                    "Speculative content detected"
-                                                )
-                                        except json.JSONDecodeError:
-                                            logging.error(
-                                                "Error parsing additionalModelFields",
-                                                exc_info=True,
-                                            )
-                                elif "textOutput" in event_data:
-                                    text_content = event_data["textOutput"]["content"]
-                                    role = event_data["textOutput"]["role"]
-                                    if role == "ASSISTANT":
-                                        logger.info(f"Assistant Message Redacted")
-                                        # here you could log the message for testing
-                                    elif role == "USER":
-                                        logger.info(f"User Message Redacted")
-                                        # here you could log the message for testing
-                                # elif 'audioOutput' in event_data:
-                                #     audio_content_event = event_data['audioOutput']
-                                #     # Log what specific audio event this is for (e.g., based on contentId or if it's for ASSISTANT role)
-                                #     # This audioOutput is Nova Sonic speaking. If it's right after a toolResult placeholder was sent,
-                                #     # this is the audio for that placeholder.
-                                #     logger.info(f"BEDROCK_AUDIO_OUT: Received audioOutput from Bedrock (contentId: {audio_content_event.get('contentId', 'N/A')}, role: {event_data.get('contentStart', {}).get('role', 'N/A') if 'contentStart' in event_data else audio_content_event.get('role', 'ASSISTANT?')}). About to queue for frontend.")
-                                #     await self.output_queue.put(json_data) # json_data is the full event containing audioOutput
-                                #     logger.info(f"BEDROCK_AUDIO_OUT: Queued audioOutput (contentId: {audio_content_event.get('contentId', 'N/A')}) onto output_queue.")
-                                # Handle tool use detection
-                                elif "toolUse" in event_data:
-                                    self.toolUseContent = event_data["toolUse"]
-                                    self.toolName = event_data["toolUse"]["toolName"]
-                                    self.toolUseId = event_data["toolUse"]["toolUseId"]
-                                    logger.info(
-                                        f"Tool use detected: {self.toolName}, ID: {self.toolUseId}"
-                                    )
-
-                                # Process tool use when content ends
-                                elif (
-                                    "contentEnd" in event_data
-                                    and event_data.get("contentEnd", {}).get("type")
-                                    == "TOOL"
-                                ):
-                                    logger.info(
-                                        "Processing tool use and sending result"
-                                    )
-
-                                    # Process the tool use
-                                    toolResult = await self.processToolUse(
-                                        self.toolName, self.toolUseContent
-                                    )
-
-                                    # Create a unique content name for this tool result
-                                    toolContent = str(uuid.uuid4())
-
-                                    logger.info(f"Tool Use Id {toolContent}")
-
-                                    # Send tool start event
-                                    tool_start_event = {
-                                        "event": {
-                                            "contentStart": {
-                                                "interactive": True,
-                                                "promptName": self.prompt_name,
-                                                "contentName": toolContent,
-                                                "type": "TOOL",
-                                                "role": "TOOL",
-                                                "toolResultInputConfiguration": {
-                                                    "toolUseId": self.toolUseId,
-                                                    "type": "TEXT",
-                                                    "textInputConfiguration": {
-                                                        "mediaType": "text/plain"
-                                                    },
-                                                },
-                                            }
-                                        }
-                                    }
-                                    await self.send_raw_event(
-                                        json.dumps(tool_start_event)
-                                    )
-                                    logger.info("Sent Content Start for Tool Event")
-
-                                    # Send tool result event
-                                    if isinstance(toolResult, dict):
-                                        try:
-                                            content_json_string = json.dumps(toolResult)
-                                            logger.info("JSON serialization successful:")
-                                        except TypeError as e:
-                                            logger.error(f"Error: JSON serialization failed: {e}")
-                                        except Exception as e:
-                                            logger.error(f"An unexpected error occurred: {e}")
-                                    else:
-                                        content_json_string = str(toolResult)
-
-                                    # check if tool use resulted in an error that needs to be reported to Sonic
-                                    status = (
-                                        "error"
-                                        if toolResult.get("status") == "error"
-                                        else "success"
-                                    )
-                                    # logger.info(f"Tool result {toolResult} and value of status is {status}")
-
-                                    tool_result_event = {
-                                        "event": {
-                                            "toolResult": {
-                                                "promptName": self.prompt_name,
-                                                "contentName": toolContent,
-                                                "content": content_json_string,
-                                                "status": status,
-                                            }
-                                        }
-                                    }
-
-                                    await self.send_raw_event(
-                                        json.dumps(tool_result_event)
-                                    )
-                                    logger.info('Sent ToolResultEvent')
-
-
-                                    # Send tool content end event
-                                    tool_content_end_event = {
-                                        "event": {
-                                            "contentEnd": {
-                                                "promptName": self.prompt_name,
-                                                "contentName": toolContent,
-                                            }
-                                        }
-                                    }
-                                    await self.send_raw_event(
-                                        json.dumps(tool_content_end_event)
-                                    )
+                            # Large non-audio payloads are parsed off the loop so audio input isn't stalled
+                            if len(response_data) > LARGE_RESPONSE_PARSE_BYTES:
+                                json_data = await asyncio.to_thread(orjson.loads, response_data)
+                            else:
+                                json_data = orjson.loads(response_data)
+
+                            # Handle different response types via the dispatch table (first handled key wins)
+                            event_data = json_data.get("event")
+                            if event_data:
+                                for event_key in event_data:
+                                    handler = self._event_dispatch.get(event_key)
+                                    if handler is not None:
+                                        await handler(event_data[event_key])
+                                        break
 
                             # Put the response in the output queue for forwarding to the frontend
                             await self.output_queue.put(json_data)
                         except json.JSONDecodeError:
+                            response_data = response_data.decode("utf-8", errors="replace")
                             logger.error(f"Failed to parse JSON from Bedrock: {response_data}")
                             await self.output_queue.put({"raw_data": response_data, "error": "JSONDecodeError"})
                     elif result.value is None: # Stream might have ended gracefully from Bedrock side
@@ -467,13 +587,12 @@ class BedrockStreamManager:
                 except asyncio.CancelledError:
                     logger.info(f"Bedrock response processing task cancelled for prompt {self.prompt_name if self.prompt_name else 'N/A'}.")
                     self.is_active = False # Ensure deactivated on cancellation
+                    cancelled = True
                     raise # Re-raise to allow task cleanup
                 except Exception as e:
                     error_message_str = str(e)
                     logger.error(f"Error receiving response from Bedrock: {error_message_str} for prompt {self.prompt_name if self.prompt_name else 'N/A'}", exc_info=True)
-                    is_fatal_bedrock_error = "Invalid voice ID" in error_message_str or \
-                                             "ValidationException" in error_message_str or \
-                                             "Error(s):" in error_message_str 
+                    is_fatal_bedrock_error = _FATAL_BEDROCK_ERROR_RE.search(error_message_str) is not None
                     if is_fatal_bedrock_error:
                         error_payload = {
                             "event": {
@@ -497,23 +616,29 @@ class BedrockStreamManager:
             if self.is_active: # Should be false if loop broken by error/end
                  self.is_active = False
             # Signal that there will be no more items for the output queue from this task
-            await self.output_queue.put(None) 
+            if cancelled:
+                # Discarded: nothing drains the queue any more, so don't wait for room
+                try:
+                    self.output_queue.put_nowait(None)
+                except asyncio.QueueFull:
+                    pass
+            else:
+                # The forwarder is still reading and must see the marker, so wait for room.
+                # If the client leaves meanwhile, discard() cancels this wait.
+                await self.output_queue.put(None)
 
     async def processToolUse(self, toolName, toolUseContent):
         """Process tool use requests and return results"""
         logger.info(f"Processing Tool Use: {toolName}")
-        logger.debug(f"Tool Use Content: {toolUseContent}")
+        logger.debug("Tool Use Content: %s", toolUseContent)
 
-        tool_key = toolName.lower()
-        if tool_key in self.tool_handlers:
-            handler = self.tool_handlers[tool_key]
+        entry = self.tool_handlers.get(toolName.lower())
+        if entry is not None:
+            handler, needs_manager = entry
             try:
                 # Pass 'self' (the BedrockStreamManager instance) to handlers that need it for async tasks
-                # if tool_key == "agentsearch": # This is a simple way to identify handlers needing 'self'
-                if tool_key in ["agentsearch", "imageanalyzer"]: # Add other tools that need 'self' here
+                if needs_manager:
                     result_payload = await handler(self, toolUseContent)
-                # Add other async tools that need 'self' to this condition,
-                # OR refactor to a more generic way for handlers to declare this need.
                 else: 
                     # For simple, synchronous handlers that don't spawn background tasks managed by the manager
                     result_payload = await handler(toolUseContent) 
@@ -532,18 +657,33 @@ class BedrockStreamManager:
             }
         
 
-    async def launch_background_tool_task(self, tool_use_id: str, tool_name: str, actual_tool_coroutine_factory):
+    def _try_acquire_background_slot(self) -> bool:
+        """Takes a background task slot if one is free. Never waits: callers run inside the Bedrock response loop."""
+        if self._active_background_count >= MAX_ACTIVE_BACKGROUND_TASKS:
+            return False
+        self._active_background_count += 1
+        return True
+
+    def _release_background_slot(self):
+        self._active_background_count -= 1
+
+    async def launch_background_tool_task(self, tool_use_id: str, tool_name: str, actual_tool_coroutine_factory) -> bool:
         """
         Launches and manages a background task for a long-running tool.
         Notification to the frontend will be sent via self.output_queue.
         actual_tool_coroutine_factory: A function that returns the coroutine for the actual tool execution.
                                     This coroutine should return the result payload for caching.
+        Returns False if every background slot is taken (system busy), True otherwise.
         """
         if tool_use_id in self.active_background_tasks:
             logger.warning(f"Background task for tool {tool_name} (ID: {tool_use_id}) is already running. Ignoring new request.")
             # Or, you could decide to cancel and restart, or queue, depending on desired behavior.
             # For now, we assume one active task per toolUseId.
-            return
+            return True
+
+        if not self._try_acquire_background_slot():
+            logger.warning(f"No background slot available for tool {tool_name} (ID: {tool_use_id}); {self._active_background_count} tasks active.")
+            return False
 
         async def task_wrapper():
             logger.info(f"Background task started for {tool_name}, ID: {tool_use_id}")
@@ -552,8 +692,10 @@ class BedrockStreamManager:
             notification_message_content = f"An unknown error occurred while processing the {tool_name}."
 
             try:
-                actual_task_coro = actual_tool_coroutine_factory()
-                result_payload_for_cache = await actual_task_coro
+                # Per-session slots bound how many tasks exist; this bounds how many run process-wide
+                async with _tool_execution_sem:
+                    actual_task_coro = actual_tool_coroutine_factory()
+                    result_payload_for_cache = await actual_task_coro
                 
                 # Cache the result using the CORRECT strategy
                 cache_key = tool_name.lower() # e.g., 'agentsearch'
@@ -562,7 +704,7 @@ class BedrockStreamManager:
                 # Updated logging to be clear and consistent
                 query_info = result_payload_for_cache.get('originalQuery', 'N/A') if isinstance(result_payload_for_cache, dict) else 'N/A'
                 logger.info(f"Background task for '{tool_name}' (display name) completed. Result for query '{query_info}' cached under key '{cache_key}' in 'completed_async_tool_results'.")
-                logger.info(f"Current state of 'completed_async_tool_results': {self.completed_async_tool_results}")                
+                logger.debug("Current state of 'completed_async_tool_results': %s", self.completed_async_tool_results)
 
                 # REMOVE THE REDUNDANT/INCORRECT CACHING LINE:
                 # self.pending_tool_results[tool_use_id] = result_payload_for_cache # <<< DELETE THIS LINE
@@ -580,11 +722,11 @@ class BedrockStreamManager:
                 logger.error(f"Error in background task for {tool_name} (ID: {tool_use_id}): {e}", exc_info=True)
                 notification_message_content = f"An error occurred in the background while processing {tool_name} (ID: {tool_use_id}): {str(e)}"
             finally:
-                if tool_use_id in self.active_background_tasks:
-                    del self.active_background_tasks[tool_use_id]
+                self.active_background_tasks.pop(tool_use_id, None)
+                self._release_background_slot()
 
-            # ... (rest of the notification sending logic remains the same) ...
-            custom_notification_to_frontend = {
+            # Serialized here, once, so the forwarder sends it without another dumps
+            custom_notification_to_frontend = orjson.dumps({
                 "customEvent": "toolCompletionNotification",
                 "payload": {
                     "toolName": tool_name,
@@ -592,7 +734,7 @@ class BedrockStreamManager:
                     "status": notification_status,
                     "message": notification_message_content,
                 }
-            }
+            })
             try:
                 await self.output_queue.put(custom_notification_to_frontend)
                 logger.info(f"Queued toolCompletionNotification for {tool_name} (ID: {tool_use_id}) to frontend via output_queue.")
@@ -605,195 +747,378 @@ class BedrockStreamManager:
         background_task = asyncio.create_task(task_wrapper())
         self.active_background_tasks[tool_use_id] = background_task
         logger.info(f"Scheduled background task for tool {tool_name} with ID {tool_use_id}")
+        return True
 
     async def deliver_screenshot_data(self, analysis_id: str, image_data_url: str | None, error_message: str | None = None):
         """
         Delivers screenshot data (or error) from frontend to the waiting background task.
         """
-        if analysis_id in self.pending_screenshot_events:
+        screenshot_future = self.pending_screenshot_events.pop(analysis_id, None)
+        if screenshot_future is not None and not screenshot_future.done():
             if error_message:
-                self.received_screenshot_data[analysis_id] = {"error": error_message} # Store error
+                received = {"error": error_message}
                 logger.info(f"MANAGER: Screenshot capture error for {analysis_id} delivered: {error_message}")
             elif image_data_url:
-                self.received_screenshot_data[analysis_id] = {"imageDataUrl": image_data_url} # Store data
-                logger.info(f"MANAGER: Screenshot data for {analysis_id} delivered and event will be set.")
+                received = {"imageDataUrl": image_data_url}
+                logger.info(f"MANAGER: Screenshot data for {analysis_id} delivered and future will be resolved.")
             else: # Should not happen if called correctly
-                self.received_screenshot_data[analysis_id] = {"error": "No image data and no error message provided."}
+                received = {"error": "No image data and no error message provided."}
                 logger.warning(f"MANAGER: deliver_screenshot_data called for {analysis_id} with no data and no error.")
 
-            event_to_set = self.pending_screenshot_events[analysis_id]
-            event_to_set.set() # Wake up the waiting _execute_image_analysis_remotely task
+            screenshot_future.set_result(received) # Wake up the waiting _execute_image_analysis_remotely task
         else:
             logger.warning(f"MANAGER: Received screenshot data/error for unknown or already processed analysis ID: {analysis_id}")
 
-async def websocket_handler(websocket, path=None):
-    """Handle WebSocket connections from the frontend without authentication."""
-    # Debug info
-    logger.info(f"New WebSocket connection with path: {path}")
+    def discard(self):
+        """Ends a session nobody is using: stops its tasks and closes the Bedrock input stream. Safe to call twice."""
+        self.is_active = False
+        if self.response_task:
+            self.response_task.cancel()
+        self._audio_evt.set() # Let _process_audio_input see is_active and exit
+        # Their notifications would have no reader, and a full output_queue would block them forever
+        for background_task in list(self.active_background_tasks.values()):
+            background_task.cancel()
+
+        stream_response, self.stream_response = self.stream_response, None
+        if stream_response is not None:
+            close_task = asyncio.create_task(self._close_input_stream(stream_response))
+            _closing_streams.add(close_task)
+            close_task.add_done_callback(_closing_streams.discard)
+
+    async def _close_input_stream(self, stream_response):
+        try:
+            await stream_response.input_stream.close()
+        except Exception as e:
+            logger.warning(f"Error closing Bedrock input stream: {e}")
+
+class BedrockStreamPool:
+    """
+    Keeps up to `size` BedrockStreamManagers with an open stream, so a new connection can skip the handshake.
+    A Bedrock stream carries a single session, so managers are handed out once and never returned;
+    a background task opens replacements and retires streams idle longer than `max_idle` seconds.
+    """
+
+    def __init__(self, size=STREAM_POOL_SIZE, max_idle=STREAM_POOL_MAX_IDLE):
+        self.size = size
+        self.max_idle = max_idle
+        self._ready = deque() # (opened_at, manager), oldest first
+        self._taken = asyncio.Event() # Set by acquire() so the refill task tops the pool back up
+        self._refill_task = None
+
+    def start(self):
+        if self.size > 0:
+            self._refill_task = asyncio.create_task(self._refill())
+
+    def acquire(self):
+        """Returns a manager with an open stream, or None if none is ready."""
+        self._evict_stale()
+        if not self._ready:
+            return None
+        _, manager = self._ready.popleft()
+        self._taken.set()
+        return manager
+
+    def _evict_stale(self):
+        now = asyncio.get_running_loop().time()
+        while self._ready:
+            opened_at, manager = self._ready[0]
+            if manager.is_active and now - opened_at < self.max_idle:
+                break
+            self._ready.popleft()
+            manager.discard()
 
-    # Send authentication success message to maintain compatibility with frontend
-    try:
-        await websocket.send(
-            json.dumps(
-                {
-                    "event": {
-                        "connectionStatus": {
-                            "status": "authenticated",
-                            "message": "Connection authenticated successfully",
-                        }
-                    }
-                }
-            )
-        )
-    except Exception as e:
-        logger.error(f"Failed to send connection message: {e}")
+    async def _refill(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._evict_stale()
+            if len(self._ready) >= self.size:
+                # Full: sleep until a manager is taken or the oldest one is due for replacement
+                self._taken.clear()
+                try:
+                    await asyncio.wait_for(self._taken.wait(), self._ready[0][0] + self.max_idle - loop.time())
+                except TimeoutError:
+                    pass
+                continue
+
+            manager = BedrockStreamManager()
+            try:
+                await asyncio.wait_for(manager.initialize_stream(), INIT_STREAM_TIMEOUT)
+            except asyncio.CancelledError:
+                manager.discard()
+                raise
+            except Exception as e:
+                manager.discard()
+                logger.warning(f"STREAM_POOL: Failed to pre-open a Bedrock stream: {e}")
+                await asyncio.sleep(STREAM_POOL_RETRY_DELAY)
+                continue
+            self._ready.append((loop.time(), manager))
+
+    async def close(self):
+        if self._refill_task:
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+        while self._ready:
+            self._ready.popleft()[1].discard()
+
+# Set up by main(); None when pre-opening streams is disabled
+_stream_pool: BedrockStreamPool | None = None
+
+# Sent on every new connection; serialized once
+_AUTH_OK_MESSAGE = orjson.dumps({
+    "event": {
+        "connectionStatus": {
+            "status": "authenticated",
+            "message": "Connection authenticated successfully",
+        }
+    }
+}).decode()
+
+# Bedrock initialization error payload, split around its message so only the message is serialized per failure
+_INIT_ERROR_PREFIX, _, _INIT_ERROR_SUFFIX = orjson.dumps({
+    "event": {
+        "error": {
+            "type": "BedrockInitializationError",
+            "fatal": True,
+            "message": None,
+        }
+    }
+}).rpartition(b"null")
+
+async def _handle_captured_screenshot(stream_manager, payload):
+    """Deliver a screenshot (or the frontend's capture error) to the waiting image analysis."""
+    logger.info("WS_HANDLER: 'capturedScreenshotData' customEvent received from frontend!") # For debugging
+    analysis_id = payload.get("imageAnalysisId") # Standardized key
+    image_data_url = payload.get("imageDataUrl")
+    error_from_frontend = payload.get("error")
+
+    if analysis_id:
+        if error_from_frontend:
+            logger.error(f"WS_HANDLER: Frontend reported error capturing screenshot for {analysis_id}: {error_from_frontend}")
+            # Deliver None or error status to potentially unblock the waiting task with an error
+            await stream_manager.deliver_screenshot_data(analysis_id, None, error_from_frontend)
+        elif image_data_url:
+            logger.info(f"WS_HANDLER: Received screenshot data for analysis ID: {analysis_id}. Attempting to deliver.")
+            await stream_manager.deliver_screenshot_data(analysis_id, image_data_url, None)
+        else:
+            logger.warning(f"WS_HANDLER: 'capturedScreenshotData' for {analysis_id} received without imageDataUrl or error.")
+            await stream_manager.deliver_screenshot_data(analysis_id, None, "Missing image data from frontend.")
+    else:
+        logger.error(f"WS_HANDLER: Missing imageAnalysisId in capturedScreenshotData: {payload}")
+
+async def _handle_audio_input(stream_manager, data, body):
+    """Queue an audio chunk instead of forwarding it to Bedrock as-is."""
+    # Decode once on ingress so the queue only ever holds raw PCM
+    audio_bytes = binascii.a2b_base64(body["content"])
+    stream_manager.add_audio_chunk(body["promptName"], body["contentName"], audio_bytes)
+
+async def _handle_prompt_start(stream_manager, data, body):
+    """Remember the prompt name, then forward the event to Bedrock."""
+    stream_manager.prompt_name = body["promptName"]
+    await stream_manager.send_raw_event(data)
+
+async def _handle_content_start(stream_manager, data, body):
+    """Remember the audio content name, then forward the event to Bedrock."""
+    if body.get("type") == "AUDIO":
+        stream_manager.audio_content_name = body["contentName"]
+    await stream_manager.send_raw_event(data)
+
+# Inbound frontend events that need more than a plain forward to Bedrock
+_EVENT_HANDLERS = {
+    "audioInput": _handle_audio_input,
+    "promptStart": _handle_prompt_start,
+    "contentStart": _handle_content_start,
+}
+
+# Out-of-band messages from the frontend, keyed by their "customEvent" name
+_CUSTOM_EVENT_HANDLERS = {
+    "capturedScreenshotData": _handle_captured_screenshot,
+}
+
+def _discard_late_stream(stream_manager, init_task):
+    """Done callback for an abandoned initialize_stream(): closes the stream if it opened after all."""
+    if init_task.cancelled() or init_task.exception() is not None:
         return
+    logger.info("Bedrock stream opened after its client gave up; shutting it down.")
+    stream_manager.discard()
 
+async def _open_stream_manager(websocket):
+    """Opens a Bedrock stream for a connection the pool had none ready for; on failure tells the client and returns None."""
     # Create a new stream manager for this connection
     stream_manager = BedrockStreamManager(
         model_id="amazon.nova-sonic-v1:0", region="us-east-1"
     )
 
     # Initialize the Bedrock stream
-    # await stream_manager.initialize_stream()
+    # Shielded so a timeout or cancel never interrupts the handshake midway; a stream that opens late is shut down
+    init_task = asyncio.create_task(stream_manager.initialize_stream())
     try:
-        await stream_manager.initialize_stream()
+        await asyncio.wait_for(asyncio.shield(init_task), timeout=INIT_STREAM_TIMEOUT)
+    except asyncio.CancelledError:
+        init_task.add_done_callback(lambda task: _discard_late_stream(stream_manager, task))
+        raise
     except Exception as init_err:
+        if not init_task.done():
+            init_task.add_done_callback(lambda task: _discard_late_stream(stream_manager, task))
+        if isinstance(init_err, TimeoutError):
+            init_err = ConnectionError(f"Timed out after {INIT_STREAM_TIMEOUT:g}s waiting for the Bedrock stream")
         logger.error(f"Bedrock stream initialization failed for client: {init_err}")
-        error_payload = {
-            "event": {
-                "error": {
-                    "type": "BedrockInitializationError",
-                    "message": f"Failed to initialize Bedrock connection: {str(init_err).splitlines()[0]}",
-                    "fatal": True
-                }
-            }
-        }
+        error_message = f"Failed to initialize Bedrock connection: {str(init_err).splitlines()[0]}"
+        error_payload = _INIT_ERROR_PREFIX + orjson.dumps(error_message) + _INIT_ERROR_SUFFIX
         try:
-            await websocket.send(json.dumps(error_payload))
+            await websocket.send(error_payload, text=True)
         except websockets.exceptions.ConnectionClosed:
             logger.info("Client connection closed before Bedrock init error could be sent.")
         except Exception as ws_send_err:
             logger.error(f"Failed to send Bedrock init error to client: {ws_send_err}")
         
         # Clean up the manager and close WebSocket if initialization failed
-        stream_manager.is_active = False # Ensure loops in manager don't run
-        if stream_manager.response_task:
-            stream_manager.response_task.cancel()
+        stream_manager.discard() # Ensure loops in manager don't run
         # Any other specific cleanup for stream_manager if partially initialized
         
         await websocket.close(code=1011, reason="Bedrock initialization failed") # 1011: Internal Error
-        return # Exit this handler
+        return None
 
-    # Start a task to forward responses from Bedrock to the WebSocket
-    forward_task = asyncio.create_task(forward_responses(websocket, stream_manager))
+    return stream_manager
 
+async def websocket_handler(websocket, path=None):
+    """Handle WebSocket connections from the frontend without authentication."""
+    # Debug info
+    logger.info(f"New WebSocket connection with path: {path}")
+
+    stream_manager = None
+    # One try covers the whole connection; a client that disconnects at any point ends up in the except* below
     try:
-        async for message in websocket:
-            try:
-                data = json.loads(message)
-                custom_event_type = data.get("customEvent") # frontend will send a message to backend OOB
-                if custom_event_type == "capturedScreenshotData":
-                    logger.info("WS_HANDLER: 'capturedScreenshotData' customEvent received from frontend!") # For debugging
-                    payload = data.get("payload", {})
-                    analysis_id = payload.get("imageAnalysisId") # Standardized key
-                    image_data_url = payload.get("imageDataUrl")
-                    error_from_frontend = payload.get("error")
-
-                    if analysis_id:
-                        if error_from_frontend:
-                            logger.error(f"WS_HANDLER: Frontend reported error capturing screenshot for {analysis_id}: {error_from_frontend}")
-                            # Deliver None or error status to potentially unblock the waiting task with an error
-                            await stream_manager.deliver_screenshot_data(analysis_id, None, error_from_frontend)
-                        elif image_data_url:
-                            logger.info(f"WS_HANDLER: Received screenshot data for analysis ID: {analysis_id}. Attempting to deliver.")
-                            await stream_manager.deliver_screenshot_data(analysis_id, image_data_url, None)
+        # Send authentication success message to maintain compatibility with frontend
+        await websocket.send(_AUTH_OK_MESSAGE)
+
+        # Take a manager whose stream is already open if one is ready, otherwise open one now
+        stream_manager = _stream_pool.acquire() if _stream_pool else None
+        if stream_manager is None:
+            stream_manager = await _open_stream_manager(websocket)
+            if stream_manager is None:
+                return # Exit this handler
+
+        async with asyncio.TaskGroup() as tg:
+            # Forward responses from Bedrock to the WebSocket while this loop reads from it
+            forward_task = tg.create_task(forward_responses(websocket, stream_manager))
+
+            async for message in websocket:
+                try:
+                    # Binary frames carry raw 16-bit PCM for the audio content opened by the last contentStart
+                    if isinstance(message, bytes):
+                        if stream_manager.prompt_name and stream_manager.audio_content_name:
+                            stream_manager.add_audio_chunk(
+                                stream_manager.prompt_name, stream_manager.audio_content_name, message
+                            )
                         else:
-                            logger.warning(f"WS_HANDLER: 'capturedScreenshotData' for {analysis_id} received without imageDataUrl or error.")
-                            await stream_manager.deliver_screenshot_data(analysis_id, None, "Missing image data from frontend.")
-                    else:
-                        logger.error(f"WS_HANDLER: Missing imageAnalysisId in capturedScreenshotData: {payload}")
-
-                elif "event" in data:
-                    event_type = list(data["event"].keys())[0]
-
-                    # Store prompt name and content names if provided
-                    if event_type == "promptStart":
-                        stream_manager.prompt_name = data["event"]["promptStart"][
-                            "promptName"
-                        ]
-                    elif (
-                        event_type == "contentStart"
-                        and data["event"]["contentStart"].get("type") == "AUDIO"
-                    ):
-                        stream_manager.audio_content_name = data["event"][
-                            "contentStart"
-                        ]["contentName"]
-
-                    # Handle audio input separately
-                    if event_type == "audioInput":
-                        # Extract audio data
-                        prompt_name = data["event"]["audioInput"]["promptName"]
-                        content_name = data["event"]["audioInput"]["contentName"]
-                        audio_base64 = data["event"]["audioInput"]["content"]
-
-                        # Add to the audio queue
-                        stream_manager.add_audio_chunk(
-                            prompt_name, content_name, audio_base64
-                        )
-                    else:
-                        # Send other events directly to Bedrock
-                        await stream_manager.send_raw_event(data)
-            except json.JSONDecodeError:
-                logger.error("Invalid JSON received from WebSocket")
-            except Exception as e:
-                logger.error(f"Error processing WebSocket message: {e}", exc_info=True)
+                            logger.warning("Binary audio frame received before promptStart/audio contentStart")
+                        continue
+
+                    data = orjson.loads(message)
+                    # frontend will send a message to backend OOB
+                    custom_handler = _CUSTOM_EVENT_HANDLERS.get(data.get("customEvent"))
+                    if custom_handler:
+                        await custom_handler(stream_manager, data.get("payload", {}))
+                    elif "event" in data:
+                        event = data["event"]
+                        event_type = next(iter(event))
+                        handler = _EVENT_HANDLERS.get(event_type)
+                        if handler:
+                            await handler(stream_manager, data, event[event_type])
+                        else:
+                            # Send other events directly to Bedrock
+                            await stream_manager.send_raw_event(data)
+                except json.JSONDecodeError:
+                    logger.error("Invalid JSON received from WebSocket")
+                except Exception as e:
+                    logger.error(f"Error processing WebSocket message: {e}", exc_info=True)
 
-    except websockets.exceptions.ConnectionClosed:
+            # The client closed cleanly; the forwarder would otherwise wait on the queue and hold the group open
+            forward_task.cancel()
+    except* websockets.exceptions.ConnectionClosed:
+        # Leaving the group with an error has already cancelled and awaited the forwarder
         logger.info("WebSocket connection closed")
     finally:
-        # Clean up the asyncio task
-        forward_task.cancel()
+        # Nothing reads this session's output any more; stop Bedrock before the bounded queue fills and blocks it
+        if stream_manager is not None:
+            stream_manager.discard()
+
 
+def _log_forwarded_response(response):
+    """DEBUG-logs one message about to be forwarded; str(response) is costly for audio, so callers gate on DEBUG."""
+    message_type = "Unknown"
+    log_detail = str(response)[:150] # Log a snippet
+
+    if isinstance(response, dict):
+        if response.get("event"):
+            event_key = next(iter(response["event"]))
+            message_type = f"BedrockEvent_{event_key}"
+            if event_key == "audioOutput":
+                log_detail = f"ContentId: {response['event']['audioOutput'].get('contentId', 'N/A')}"
+            elif event_key == "textOutput":
+                log_detail = f"Role: {response['event']['textOutput'].get('role')}, Content: {str(response['event']['textOutput'].get('content'))[:50]}..."
+
+    logger.debug("FORWARD_TASK: Dequeued '%s'. Details: %s. About to send to WebSocket.", message_type, log_detail)
+
+def _encode_forwarded_response(response) -> bytes:
+    # bytes are pre-serialized (Bedrock audioOutput events, tool completion notifications) and go out unchanged
+    return response if isinstance(response, bytes) else orjson.dumps(response)
 
 async def forward_responses(websocket, stream_manager):
-    """Forward responses from Bedrock to the WebSocket."""
+    """
+    Forward responses from Bedrock to the WebSocket.
+    Messages already waiting in the queue are sent together as one {"event": {"batch": [...]}} frame.
+    """
     logger.debug("FORWARD_TASK: Started for a new WebSocket connection.")
+    output_queue = stream_manager.output_queue
     try:
         while True:
-            response = await stream_manager.output_queue.get()
+            response = await output_queue.get()
             if response is None: # End of stream signal
                 logger.debug("FORWARD_TASK: Received None from output_queue, terminating forwarder.")
                 break
 
-            # Identify the type of message being forwarded
-            message_type = "Unknown"
-            log_detail = str(response)[:150] # Log a snippet
-
-            if isinstance(response, dict):
-                if response.get("customEvent") == "toolCompletionNotification":
-                    message_type = "CustomToolNotification"
-                    log_detail = f"Tool: {response.get('payload', {}).get('toolName')}, Status: {response.get('payload', {}).get('status')}"
-                elif response.get("event"):
-                    event_key = list(response["event"].keys())[0]
-                    message_type = f"BedrockEvent_{event_key}"
-                    if event_key == "audioOutput":
-                        log_detail = f"ContentId: {response['event']['audioOutput'].get('contentId', 'N/A')}"
-                    elif event_key == "textOutput":
-                        log_detail = f"Role: {response['event']['textOutput'].get('role')}, Content: {str(response['event']['textOutput'].get('content'))[:50]}..."
-            
-            logger.debug(f"FORWARD_TASK: Dequeued '{message_type}'. Details: {log_detail}. About to send to WebSocket.")
-            
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            if debug_enabled:
+                _log_forwarded_response(response)
+            frames = [_encode_forwarded_response(response)]
+            batch_bytes = len(frames[0])
+            end_of_stream = False
+
+            # Drain whatever is already queued, within the count and size budgets
+            while len(frames) < WS_BATCH_MAX and batch_bytes < WS_BATCH_BYTES:
+                try:
+                    response = output_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if response is None:
+                    end_of_stream = True
+                    break
+                if debug_enabled:
+                    _log_forwarded_response(response)
+                frames.append(_encode_forwarded_response(response))
+                batch_bytes += len(frames[-1])
+
+            # A lone message goes out as-is, so low-rate traffic looks exactly as before
+            frame = frames[0] if len(frames) == 1 else b'{"event":{"batch":[' + b",".join(frames) + b"]}}"
+
             try:
-                await websocket.send(json.dumps(response))
-                logger.debug(f"FORWARD_TASK: Successfully sent '{message_type}' to WebSocket.")
+                await websocket.send(frame, text=True)
+                logger.debug("FORWARD_TASK: Successfully sent %d message(s) to WebSocket.", len(frames))
             except websockets.exceptions.ConnectionClosed:
                 logger.warning("FORWARD_TASK: WebSocket connection closed while trying to send. Terminating forwarder.")
                 break
             except Exception as send_err:
-                logger.error(f"FORWARD_TASK: Error sending '{message_type}' to WebSocket: {send_err}")
+                logger.error(f"FORWARD_TASK: Error sending {len(frames)} message(s) to WebSocket: {send_err}")
                 # Decide if to break or continue
                 break 
+
+            if end_of_stream:
+                logger.debug("FORWARD_TASK: Received None from output_queue, terminating forwarder.")
+                break
     except asyncio.CancelledError:
         logger.debug("FORWARD_TASK: Cancelled.")
     except Exception as e:
@@ -828,19 +1153,42 @@ async def main():
     # Start WebSocket server with the simplified handler
     logger.info(f"Starting WebSocket server on {host}:{port}")
 
+    global _stream_pool
+    if STREAM_POOL_SIZE > 0:
+        _stream_pool = BedrockStreamPool()
+        _stream_pool.start()
+
     try:
-        async with websockets.serve(websocket_handler, host, port):
+        async with websockets.serve(
+            websocket_handler,
+            host,
+            port,
+            compression=None, # Audio is base64/PCM; deflate costs CPU per frame for next to no gain
+            max_size=2**22, # Screenshot data URLs can exceed the 1 MiB default
+            max_queue=32, # Inbound frames buffered before reads apply backpressure
+            ping_interval=20,
+            ping_timeout=20,
+            write_limit=2**20, # Outbound buffer before send() waits for the client to catch up
+        ):
             logger.info(f"WebSocket server started {host}:{port}")
             # Keep the server running forever
             await asyncio.Future()
     except Exception as e:
         logger.error(f"Server startup error: {e}", exc_info=True)
+    finally:
+        # Release the process-wide A2A connection pools and any pre-opened Bedrock streams
+        await close_a2a_clients()
+        if _stream_pool:
+            await _stream_pool.close()
 
 
 if __name__ == "__main__":
-    # Run the main function
+    # Run the main function (on uvloop where available)
     try:
-        asyncio.run(main())
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
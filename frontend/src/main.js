@@ -67,11 +67,8 @@ async function startStreaming() {
         const s = Math.max(-1, Math.min(1, inputData[i]));
         pcmData[i] = s < 0 ? s * 0x8000 : s * 0x7fff;
       }
-      const base64data = btoa(
-        String.fromCharCode.apply(null, new Uint8Array(pcmData.buffer))
-      );
       if (wsManager && connectionReady) {
-        wsManager.sendAudioChunk(base64data);
+        wsManager.sendAudioChunk(pcmData.buffer);
       }
     };
 
@@ -90,15 +90,26 @@ export class WebSocketEventManager {
 
     this.socket.onmessage = (event) => {
       // console.log("🔍 RAW WEBSOCKET MESSAGE:", event.data); // Can be very verbose
+      let messages;
       try {
-        const data = JSON.parse(event.data);
-        // // console.log("📦 PARSED MESSAGE:", JSON.stringify(data, null, 2)); // Verbose
-        // if (data.event) {
-        //   // console.log("🔔 EVENT TYPE:", Object.keys(data.event)[0]); // Verbose
-        // } else {
-        //   console.log("⚠️ NO EVENT OBJECT FOUND IN MESSAGE. Keys:", Object.keys(data));
-        // }
-        // this.handleMessage(data);
+        const parsed = JSON.parse(event.data);
+        // The backend may coalesce several messages into one frame as {"event": {"batch": [...]}}
+        messages = parsed.event && Array.isArray(parsed.event.batch) ? parsed.event.batch : [parsed];
+      } catch (e) {
+        console.error("❌ Error parsing WebSocket message:", e);
+        console.error("📄 Raw message data:", event.data);
+        return;
+      }
+      // Each message is handled on its own, so one failing event doesn't drop the rest of its batch
+      for (const data of messages) {
+        try {
+          // // console.log("📦 PARSED MESSAGE:", JSON.stringify(data, null, 2)); // Verbose
+          // if (data.event) {
+          //   // console.log("🔔 EVENT TYPE:", Object.keys(data.event)[0]); // Verbose
+          // } else {
+          //   console.log("⚠️ NO EVENT OBJECT FOUND IN MESSAGE. Keys:", Object.keys(data));
+          // }
+          // this.handleMessage(data);
           if (data.customEvent && data.customEvent === "toolCompletionNotification") {
               this.handleToolCompletionNotification(data.payload);
           } else if (data.event) {
@@ -116,9 +127,10 @@ export class WebSocketEventManager {
               console.warn("Received WebSocket message of unknown structure:", data);
           }
         } catch (e) {
-          console.error("❌ Error parsing WebSocket message:", e);
-          console.error("📄 Raw message data:", event.data);
+          console.error("❌ Error handling WebSocket message:", e);
+          console.error("📄 Message data:", data);
         }
+      }
     };
 
     this.socket.onerror = (error) => {
@@ -374,7 +386,8 @@ export class WebSocketEventManager {
     });
   }
 
-  sendAudioChunk(base64AudioData) {
+  // pcmBuffer is raw 16-bit PCM; it goes out as a binary frame and the backend base64-encodes it for Bedrock
+  sendAudioChunk(pcmBuffer) {
     if (!this.promptName || !this.audioContentName) {
       console.error("Cannot send audio chunk - missing promptName or audioContentName");
       return;
@@ -383,16 +396,11 @@ export class WebSocketEventManager {
         // console.log("Attempted to send audio chunk but not processing or socket not open."); // Can be verbose
         return;
     }
-    this.sendEvent({
-      event: {
-        audioInput: {
-          promptName: this.promptName,
-          contentName: this.audioContentName,
-          content: base64AudioData,
-          role: "USER", // Redundant if already in contentStart, but often included
-        },
-      },
-    });
+    try {
+      this.socket.send(pcmBuffer);
+    } catch (error) {
+      console.error("Error sending audio chunk:", error);
+    }
   }
 
   endContent() { // Call this when user stops talking (if implementing VAD) or before ending prompt